@@ -13,7 +13,10 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials, APIKeyCookie
 
 from backend.config import settings
-from backend.database import get_user_by_id, get_user_by_email, get_user_by_supabase_uid
+from backend.database import (
+    get_user_by_id, get_user_by_email, get_user_by_supabase_uid,
+    get_user_with_subscription,
+)
 
 logger = logging.getLogger("rag.auth")
 
@@ -189,7 +192,9 @@ async def _resolve_user_from_token(token: str) -> dict | None:
     payload = decode_token(token)
     if payload and "sub" in payload:
         user_id = int(payload["sub"])
-        return await get_user_by_id(user_id)
+        # Also primes the subscription cache for require_subscription().
+        user, _ = await get_user_with_subscription(user_id)
+        return user
 
     return None
 
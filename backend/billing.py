@@ -22,9 +22,10 @@ from backend.database import (
     get_user_by_id,
     get_user_by_email,
     update_user_billing,
-    get_active_subscription,
+    get_user_with_subscription,
     upsert_subscription,
     set_trial_used_on_subscription,
+    transaction,
 )
 
 logger = logging.getLogger("rag.billing")
@@ -137,16 +138,17 @@ async def process_callback(data_str: str, ss1: str) -> dict:
     user_id = user["id"]
     premium_until = datetime.utcnow() + timedelta(days=PREMIUM_DAYS)
 
-    await update_user_billing(user_id, is_premium=True, subscription_status="active")
-    await upsert_subscription(
-        user_id=user_id,
-        purchase_token=order_id,
-        product_id="paysera_onetime",
-        status="active",
-        current_period_end=premium_until.strftime("%Y-%m-%dT%H:%M:%S"),
-        platform="paysera",
-    )
-    await set_trial_used_on_subscription(user_id)
+    async with transaction():
+        await update_user_billing(user_id, is_premium=True, subscription_status="active")
+        await upsert_subscription(
+            user_id=user_id,
+            purchase_token=order_id,
+            product_id="paysera_onetime",
+            status="active",
+            current_period_end=premium_until.strftime("%Y-%m-%dT%H:%M:%S"),
+            platform="paysera",
+        )
+        await set_trial_used_on_subscription(user_id)
 
     logger.info(
         f"User {user_id} activated via Paysera until {premium_until.date()} "
@@ -173,7 +175,7 @@ async def _resolve_user_from_order(order_id: str, email: str) -> dict | None:
 # ── Billing Status ───────────────────────────────────────────
 
 async def get_billing_status(user_id: int) -> dict:
-    user = await get_user_by_id(user_id)
+    user, sub = await get_user_with_subscription(user_id)
     if not user:
         return {"error": "User not found"}
 
@@ -195,8 +197,6 @@ async def get_billing_status(user_id: int) -> dict:
         elif end:
             trial_expired = True
 
-    sub = await get_active_subscription(user_id)
-
     return {
         "user_id": user_id,
         "email": user["email"],
@@ -19,6 +19,7 @@ class Settings(BaseSettings):
     # Chunking (LangChain RecursiveCharacterTextSplitter)
     CHUNK_SIZE: int = 800
     CHUNK_OVERLAP: int = 100
+    PROCESSING_WORKERS: int = 2         # processes for parsing/chunking uploads
 
     # RAG — retrieval
     TOP_K_RESULTS: int = 10
@@ -79,6 +80,9 @@ class Settings(BaseSettings):
 
     # Database
     DATABASE_URL: str = os.environ.get("DATABASE_URL", "")
+    DB_POOL_MIN_SIZE: int = 2
+    DB_POOL_MAX_SIZE: int = 10
+    DB_STATEMENT_CACHE_SIZE: int = 256  # prepared statements kept per connection
 
     # Paths
     BASE_DIR: Path = Path(__file__).resolve().parent.parent
@@ -6,7 +6,7 @@ and deduplicates.
 """
 
 import logging
-from backend.database import _get_pool
+from backend.database import _pool_sync
 
 logger = logging.getLogger("rag.stitcher")
 
@@ -33,7 +33,7 @@ async def stitch_neighbors(chunks: list[dict], window: int = 1) -> list[dict]:
         doc_id = str(c.get("doc_id") or c.get("document_id", ""))
         doc_chunks.setdefault(doc_id, []).append(c)
 
-    pool = await _get_pool()
+    pool = _pool_sync()
     async with pool.acquire() as conn:
         for doc_id, doc_chunk_list in doc_chunks.items():
             if not doc_id:
@@ -3,16 +3,48 @@
 Uses asyncpg with a connection pool.  Requires DATABASE_URL to be set.
 """
 
+import asyncio
 import asyncpg
 import json
 import logging
 import re
+import time
+from collections import defaultdict, deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from functools import lru_cache
 from datetime import datetime
 from backend.config import settings
 
+try:
+    import ahocorasick  # pyahocorasick
+except ImportError:  # pragma: no cover — falls back to a pure-Python prefix scan
+    ahocorasick = None
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover — stdlib json is a drop-in, just slower
+    orjson = None
+
 logger = logging.getLogger("rag.database")
 
 
+def _json_dumps(obj) -> str:
+    """Serialize to a JSON string (orjson when available)."""
+    if orjson is not None:
+        return orjson.dumps(obj).decode()
+    return json.dumps(obj)
+
+
+def _json_loads(raw, default):
+    """Decode a JSON column, returning ``default`` for NULL/empty values."""
+    if not raw:
+        return default
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
 def _parse_ts(val) -> datetime | None:
     """Convert a string/datetime to a datetime object, or None."""
     if val is None:
@@ -30,6 +62,30 @@ def _parse_ts(val) -> datetime | None:
 
 _pool: asyncpg.Pool | None = None
 
+# Applied once per pooled connection at connect time.  The workload is
+# short OLTP statements plus FTS over document_chunks, where JIT compile
+# time routinely exceeds the query itself.
+_SESSION_SETTINGS = {
+    "application_name": "albanian-law-ai",
+    "jit": "off",
+}
+
+
+async def _prewarm_connection(conn: asyncpg.Connection):
+    """Prepare the per-request auth reads on a fresh pool connection.
+
+    asyncpg's statement cache is per connection and keyed on the exact SQL
+    text, so running each hot read once (with NULL arguments, matching no
+    rows) saves the first real request on this connection a Parse round
+    trip.  On a brand-new database the tables don't exist yet; that's fine.
+    """
+    for sql in (_USER_BY_ID_SQL, _USER_BY_EMAIL_SQL, _USER_BY_UID_SQL,
+                _ACTIVE_SUBSCRIPTION_SQL, _USER_WITH_SUBSCRIPTION_SQL):
+        try:
+            await conn.fetch(sql, None)
+        except asyncpg.PostgresError:
+            return
+
 
 async def _get_pool() -> asyncpg.Pool:
     global _pool
@@ -37,596 +93,923 @@ async def _get_pool() -> asyncpg.Pool:
         url = settings.DATABASE_URL
         if not url:
             raise RuntimeError("DATABASE_URL is not set")
-        _pool = await asyncpg.create_pool(url, min_size=2, max_size=10)
+        # Idle connections are never recycled, so each connection's
+        # prepared-statement cache and backend catalog cache stay warm.
+        _pool = await asyncpg.create_pool(
+            url,
+            min_size=settings.DB_POOL_MIN_SIZE,
+            max_size=settings.DB_POOL_MAX_SIZE,
+            max_inactive_connection_lifetime=0,
+            statement_cache_size=settings.DB_STATEMENT_CACHE_SIZE,
+            server_settings=_SESSION_SETTINGS,
+            init=_prewarm_connection,
+        )
         logger.info("PostgreSQL connection pool created")
     return _pool
 
 
+def _pool_sync() -> asyncpg.Pool:
+    """Return the pool created by init_db() without an extra coroutine hop."""
+    pool = _pool
+    if pool is None:
+        raise RuntimeError("Database pool is not initialized (call init_db first)")
+    return pool
+
+
+# Connection of the enclosing transaction() block, if any.  Helpers run on it
+# instead of the pool so grouped writes share a single commit.
+_current_conn: ContextVar[asyncpg.Connection | None] = ContextVar("_current_conn", default=None)
+_tx_dirty_users: ContextVar[set | None] = ContextVar("_tx_dirty_users", default=None)
+
+
+def _executor():
+    """Return the active transaction's connection, else the pool."""
+    return _current_conn.get() or _pool_sync()
+
+
+@asynccontextmanager
+async def transaction():
+    """Group the DB helpers called inside the block into one commit.
+
+    Usage::
+
+        async with transaction():
+            await upsert_subscription(...)
+            await set_trial_used_on_subscription(user_id)
+    """
+    conn = _current_conn.get()
+    if conn is not None:
+        async with conn.transaction():
+            yield conn
+        return
+    dirty: set = set()
+    async with _pool_sync().acquire() as conn:
+        conn_token = _current_conn.set(conn)
+        dirty_token = _tx_dirty_users.set(dirty)
+        try:
+            async with conn.transaction():
+                yield conn
+        finally:
+            _current_conn.reset(conn_token)
+            _tx_dirty_users.reset(dirty_token)
+    # Readers outside the transaction may have re-cached pre-commit rows.
+    for user_id, email in dirty:
+        invalidate_user_cache(user_id, email)
+
+
 async def close_pool():
-    global _pool
+    global _pool, _chat_writer_task
+    if _chat_writer_task is not None:
+        await flush_chat()
+        _chat_writer_task.cancel()
+        _chat_writer_task = None
     if _pool:
         await _pool.close()
         _pool = None
 
 
-async def init_db():
-    """Create tables, indexes, and seed data."""
-    pool = await _get_pool()
-    async with pool.acquire() as conn:
-        # ── Users ──
-        await conn.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                id SERIAL PRIMARY KEY,
-                email TEXT UNIQUE NOT NULL,
-                password_hash TEXT DEFAULT '',
-                is_admin BOOLEAN DEFAULT FALSE,
-                supabase_uid TEXT UNIQUE,
-                trial_ends_at TIMESTAMPTZ,
-                trial_used_at TIMESTAMPTZ,
-                signup_ip TEXT,
-                stripe_customer_id TEXT,
-                stripe_subscription_id TEXT,
-                is_premium BOOLEAN DEFAULT FALSE,
-                subscription_status TEXT DEFAULT '',
-                created_at TIMESTAMPTZ DEFAULT NOW()
-            )
-        """)
-        for col, coltype, default in [
-            ("stripe_customer_id", "TEXT", "NULL"),
-            ("stripe_subscription_id", "TEXT", "NULL"),
-            ("is_premium", "BOOLEAN", "FALSE"),
-            ("subscription_status", "TEXT", "''"),
-        ]:
-            try:
-                await conn.execute(
-                    f"ALTER TABLE users ADD COLUMN IF NOT EXISTS {col} {coltype} DEFAULT {default}"
-                )
-            except Exception:
-                pass
+_CHUNKS_FTS_INDEX_SQL = """
+    CREATE INDEX IF NOT EXISTS idx_chunks_fts
+    ON document_chunks USING GIN (to_tsvector('simple', content))
+"""
+
+_CHUNKS_RUM_INDEX_SQL = """
+    CREATE INDEX IF NOT EXISTS idx_chunks_rum
+    ON document_chunks USING rum (to_tsvector('simple', content) rum_tsvector_ops)
+"""
+
+# Set by init_db() once the RUM extension and index are known to exist.
+_use_rum = False
+
+
+# Only per-owner document counts are materialized.  A single global row
+# would serialize every concurrent insert/delete on its row lock until
+# commit; the global totals are rare reads and use COUNT(*) instead.
+_APP_COUNTER_TRIGGERS_SQL = """
+    DROP TRIGGER IF EXISTS trg_users_counter ON users;
+    DROP FUNCTION IF EXISTS bump_users_counter();
+    DELETE FROM app_counters WHERE name IN ('users', 'documents');
+
+    CREATE OR REPLACE FUNCTION bump_documents_counter() RETURNS TRIGGER AS $$
+    DECLARE
+        delta BIGINT := CASE WHEN TG_OP = 'INSERT' THEN 1 ELSE -1 END;
+        owner INTEGER := CASE WHEN TG_OP = 'INSERT' THEN NEW.user_id ELSE OLD.user_id END;
+    BEGIN
+        IF owner IS NOT NULL THEN
+            INSERT INTO app_counters (name, value) VALUES ('documents:user:' || owner, delta)
+            ON CONFLICT (name) DO UPDATE SET value = app_counters.value + EXCLUDED.value;
+        END IF;
+        RETURN NULL;
+    END $$ LANGUAGE plpgsql;
+
+    DROP TRIGGER IF EXISTS trg_documents_counter ON documents;
+    CREATE TRIGGER trg_documents_counter AFTER INSERT OR DELETE ON documents
+        FOR EACH ROW EXECUTE FUNCTION bump_documents_counter();
+"""
 
-        # ── Documents ──
+
+async def _init_app_counters(conn):
+    """Create app_counters + triggers; seed from COUNT(*) on first run."""
+    async with conn.transaction():
         await conn.execute("""
-            CREATE TABLE IF NOT EXISTS documents (
-                id SERIAL PRIMARY KEY,
-                user_id INTEGER REFERENCES users(id),
-                filename TEXT NOT NULL,
-                original_filename TEXT NOT NULL,
-                file_type TEXT NOT NULL,
-                file_size INTEGER NOT NULL,
-                title TEXT,
-                law_number TEXT,
-                law_date TEXT,
-                status TEXT DEFAULT 'processing',
-                total_chunks INTEGER DEFAULT 0,
-                page_count INTEGER DEFAULT 0,
-                error_message TEXT,
-                metadata_json TEXT DEFAULT '{}',
-                storage_bucket TEXT DEFAULT 'Ligje',
-                storage_path TEXT,
-                uploaded_at TIMESTAMPTZ DEFAULT NOW(),
-                processed_at TIMESTAMPTZ
+            CREATE TABLE IF NOT EXISTS app_counters (
+                name TEXT PRIMARY KEY,
+                value BIGINT NOT NULL DEFAULT 0
             )
         """)
-        # Add storage columns if table already exists without them
-        for col, default in [("storage_bucket", "'Ligje'"), ("storage_path", "NULL")]:
-            try:
+        await conn.execute(_APP_COUNTER_TRIGGERS_SQL)
+        seeded = await conn.fetchval("SELECT EXISTS (SELECT 1 FROM app_counters)")
+        if not seeded:
+            await conn.execute("""
+                INSERT INTO app_counters (name, value)
+                SELECT 'documents:user:' || user_id, COUNT(*)
+                FROM documents WHERE user_id IS NOT NULL GROUP BY user_id
+                ON CONFLICT (name) DO UPDATE SET value = EXCLUDED.value
+            """)
+            logger.info("app_counters seeded from table counts")
+
+
+async def _read_counter(name: str) -> int:
+    pool = _executor()
+    value = await pool.fetchval("SELECT value FROM app_counters WHERE name = $1", name)
+    return value or 0
+
+
+# Bump whenever _apply_schema() changes so existing databases re-run it.
+_SCHEMA_VERSION = 7
+
+
+async def init_db():
+    """Create tables, indexes, and seed data.
+
+    All DDL runs in one transaction under an advisory lock, and is skipped
+    entirely on warm starts where schema_version is already current.
+    """
+    global _use_rum
+    pool = await _get_pool()
+    async with pool.acquire() as conn:
+        # Warm start: one unlocked read, no transaction, no DDL.
+        version = await _read_schema_version(conn)
+        if version is None or version < _SCHEMA_VERSION:
+            async with conn.transaction():
+                await conn.execute("SELECT pg_advisory_xact_lock(hashtext('albanian-law-ai:init_db'))")
                 await conn.execute(
-                    f"ALTER TABLE documents ADD COLUMN IF NOT EXISTS {col} TEXT DEFAULT {default}"
+                    "CREATE TABLE IF NOT EXISTS schema_version (version INTEGER NOT NULL)"
                 )
-            except Exception:
-                pass
+                # Re-check under the lock: another worker may have migrated.
+                version = await conn.fetchval("SELECT MAX(version) FROM schema_version")
+                if version is None or version < _SCHEMA_VERSION:
+                    logger.info(f"Applying schema (version {version} -> {_SCHEMA_VERSION})")
+                    await _apply_schema(conn)
+                    await conn.execute("DELETE FROM schema_version")
+                    await conn.execute(
+                        "INSERT INTO schema_version (version) VALUES ($1)", _SCHEMA_VERSION
+                    )
+        _use_rum = await conn.fetchval("SELECT to_regclass('idx_chunks_rum') IS NOT NULL")
+        await _prewarm_search_indexes(conn)
+        await _warm_ip_signups(conn)
+
+    _start_chat_writer()
+    logger.info("Database initialized successfully")
 
-        # ── Document Chunks ──
-        await conn.execute("""
-            CREATE TABLE IF NOT EXISTS document_chunks (
-                id SERIAL PRIMARY KEY,
-                document_id INTEGER NOT NULL REFERENCES documents(id) ON DELETE CASCADE,
-                user_id INTEGER NOT NULL,
-                chunk_index INTEGER NOT NULL,
-                content TEXT NOT NULL,
-                article TEXT,
-                section_title TEXT DEFAULT '',
-                pages TEXT,
-                page_start INTEGER,
-                page_end INTEGER,
-                char_count INTEGER DEFAULT 0
-            )
-        """)
+
+async def _prewarm_search_indexes(conn):
+    """Pull the chunk FTS indexes into shared buffers (needs pg_prewarm).
+
+    keyword_search_chunks is on the user-facing path; after a restart its
+    first queries would otherwise read index pages from disk one by one.
+    """
+    if not await conn.fetchval(
+        "SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_prewarm')"
+    ):
+        return
+    indexes = ["idx_chunks_fts"] + (["idx_chunks_rum"] if _use_rum else [])
+    for name in indexes:
         try:
-            await conn.execute(
-                "ALTER TABLE document_chunks ADD COLUMN IF NOT EXISTS section_title TEXT DEFAULT ''"
+            # A partitioned index has no storage of its own; warm its leaves.
+            # For a plain index the tree is just the index itself.
+            leaves = await conn.fetch(
+                "SELECT relid::regclass::text AS leaf FROM pg_partition_tree($1::regclass) "
+                "WHERE isleaf",
+                name,
             )
-        except Exception:
-            pass
+            for r in leaves:
+                blocks = await conn.fetchval("SELECT pg_prewarm($1::regclass)", r["leaf"])
+                logger.info(f"Prewarmed {r['leaf']} ({blocks} blocks)")
+        except asyncpg.PostgresError as e:
+            logger.info(f"Could not prewarm {name}: {e}")
 
-        # ── Chat Messages ──
-        await conn.execute("""
-            CREATE TABLE IF NOT EXISTS chat_messages (
-                id SERIAL PRIMARY KEY,
-                session_id TEXT NOT NULL,
-                role TEXT NOT NULL,
-                content TEXT NOT NULL,
-                sources_json TEXT DEFAULT '[]',
-                created_at TIMESTAMPTZ DEFAULT NOW()
-            )
-        """)
 
-        # ── Subscriptions ──
-        await conn.execute("""
-            CREATE TABLE IF NOT EXISTS subscriptions (
-                id SERIAL PRIMARY KEY,
-                user_id INTEGER NOT NULL REFERENCES users(id),
-                purchase_token TEXT,
-                product_id TEXT,
-                platform TEXT DEFAULT 'google_play',
-                status TEXT NOT NULL,
-                current_period_end TIMESTAMPTZ,
-                created_at TIMESTAMPTZ DEFAULT NOW(),
-                updated_at TIMESTAMPTZ DEFAULT NOW()
-            )
-        """)
+async def _read_schema_version(conn) -> int | None:
+    try:
+        return await conn.fetchval("SELECT MAX(version) FROM schema_version")
+    except asyncpg.UndefinedTableError:
+        return None
 
-        # ── Suggested Questions ──
-        await conn.execute("""
-            CREATE TABLE IF NOT EXISTS suggested_questions (
-                id SERIAL PRIMARY KEY,
-                category TEXT NOT NULL,
-                question TEXT NOT NULL,
-                sort_order INTEGER DEFAULT 0,
-                is_active BOOLEAN DEFAULT TRUE,
-                created_at TIMESTAMPTZ DEFAULT NOW(),
-                UNIQUE(category, question)
-            )
-        """)
 
-        # ── Indexes ──
-        index_statements = [
-            "CREATE INDEX IF NOT EXISTS idx_documents_user_id ON documents(user_id)",
-            "CREATE INDEX IF NOT EXISTS idx_documents_status ON documents(status)",
-            "CREATE INDEX IF NOT EXISTS idx_documents_user_status ON documents(user_id, status)",
-            "CREATE INDEX IF NOT EXISTS idx_chunks_document_id ON document_chunks(document_id)",
-            "CREATE INDEX IF NOT EXISTS idx_chunks_user_id ON document_chunks(user_id)",
-            "CREATE INDEX IF NOT EXISTS idx_chunks_user_doc ON document_chunks(user_id, document_id)",
-            "CREATE INDEX IF NOT EXISTS idx_chat_session ON chat_messages(session_id)",
-            "CREATE INDEX IF NOT EXISTS idx_sq_active ON suggested_questions(is_active)",
-        ]
-        for stmt in index_statements:
-            await conn.execute(stmt)
+async def _add_missing_columns(conn, table: str, columns: list[tuple[str, str, str]]):
+    """Add ``(name, type, default)`` columns in one ALTER TABLE statement.
 
-        # GIN index for full-text search on chunk content
+    A single ALTER takes the table lock once and rewrites the catalog once,
+    instead of one savepoint + ALTER per column.
+    """
+    clauses = ", ".join(
+        f"ADD COLUMN IF NOT EXISTS {col} {coltype} DEFAULT {default}"
+        for col, coltype, default in columns
+    )
+    try:
+        async with conn.transaction():
+            await conn.execute(f"ALTER TABLE {table} {clauses}")
+    except Exception as e:
+        logger.warning(f"Could not add columns to {table}: {e}")
+
+
+async def _apply_schema(conn):
+    """Create/migrate every table and index (runs inside init_db's transaction)."""
+    # ── Users ──
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS users (
+            id SERIAL PRIMARY KEY,
+            email TEXT UNIQUE NOT NULL,
+            password_hash TEXT DEFAULT '',
+            is_admin BOOLEAN DEFAULT FALSE,
+            supabase_uid TEXT UNIQUE,
+            trial_ends_at TIMESTAMPTZ,
+            trial_used_at TIMESTAMPTZ,
+            signup_ip TEXT,
+            stripe_customer_id TEXT,
+            stripe_subscription_id TEXT,
+            is_premium BOOLEAN DEFAULT FALSE,
+            subscription_status TEXT DEFAULT '',
+            created_at TIMESTAMPTZ DEFAULT NOW()
+        )
+    """)
+    await _add_missing_columns(conn, "users", [
+        ("stripe_customer_id", "TEXT", "NULL"),
+        ("stripe_subscription_id", "TEXT", "NULL"),
+        ("is_premium", "BOOLEAN", "FALSE"),
+        ("subscription_status", "TEXT", "''"),
+    ])
+
+    # ── Documents ──
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS documents (
+            id SERIAL PRIMARY KEY,
+            user_id INTEGER REFERENCES users(id),
+            filename TEXT NOT NULL,
+            original_filename TEXT NOT NULL,
+            file_type TEXT NOT NULL,
+            file_size INTEGER NOT NULL,
+            title TEXT,
+            law_number TEXT,
+            law_date TEXT,
+            status TEXT DEFAULT 'processing',
+            total_chunks INTEGER DEFAULT 0,
+            page_count INTEGER DEFAULT 0,
+            error_message TEXT,
+            metadata_json TEXT DEFAULT '{}',
+            storage_bucket TEXT DEFAULT 'Ligje',
+            storage_path TEXT,
+            uploaded_at TIMESTAMPTZ DEFAULT NOW(),
+            processed_at TIMESTAMPTZ
+        )
+    """)
+    # Add storage columns if table already exists without them
+    await _add_missing_columns(conn, "documents", [
+        ("storage_bucket", "TEXT", "'Ligje'"),
+        ("storage_path", "TEXT", "NULL"),
+    ])
+
+    # ── Document Chunks ──
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS document_chunks (
+            id SERIAL PRIMARY KEY,
+            document_id INTEGER NOT NULL REFERENCES documents(id) ON DELETE CASCADE,
+            user_id INTEGER NOT NULL,
+            chunk_index INTEGER NOT NULL,
+            content TEXT NOT NULL,
+            article TEXT,
+            section_title TEXT DEFAULT '',
+            pages TEXT,
+            page_start INTEGER,
+            page_end INTEGER,
+            char_count INTEGER DEFAULT 0
+        )
+    """)
+    await _add_missing_columns(conn, "document_chunks", [
+        ("section_title", "TEXT", "''"),
+    ])
+
+    # ── Chat Messages ──
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS chat_messages (
+            id SERIAL PRIMARY KEY,
+            session_id TEXT NOT NULL,
+            role TEXT NOT NULL,
+            content TEXT NOT NULL,
+            sources_json TEXT DEFAULT '[]',
+            created_at TIMESTAMPTZ DEFAULT NOW()
+        )
+    """)
+
+    # ── Subscriptions ──
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS subscriptions (
+            id SERIAL PRIMARY KEY,
+            user_id INTEGER NOT NULL REFERENCES users(id),
+            purchase_token TEXT,
+            product_id TEXT,
+            platform TEXT DEFAULT 'google_play',
+            status TEXT NOT NULL,
+            current_period_end TIMESTAMPTZ,
+            created_at TIMESTAMPTZ DEFAULT NOW(),
+            updated_at TIMESTAMPTZ DEFAULT NOW()
+        )
+    """)
+
+    # ── Suggested Questions ──
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS suggested_questions (
+            id SERIAL PRIMARY KEY,
+            category TEXT NOT NULL,
+            question TEXT NOT NULL,
+            sort_order INTEGER DEFAULT 0,
+            is_active BOOLEAN DEFAULT TRUE,
+            created_at TIMESTAMPTZ DEFAULT NOW(),
+            UNIQUE(category, question)
+        )
+    """)
+
+    # ── Indexes ──
+    index_statements = [
+        "CREATE INDEX IF NOT EXISTS idx_documents_user_id ON documents(user_id)",
+        "CREATE INDEX IF NOT EXISTS idx_documents_status ON documents(status)",
+        "CREATE INDEX IF NOT EXISTS idx_documents_user_status ON documents(user_id, status)",
+        "CREATE INDEX IF NOT EXISTS idx_chunks_document_id ON document_chunks(document_id)",
+        "CREATE INDEX IF NOT EXISTS idx_chunks_user_id ON document_chunks(user_id)",
+        "CREATE INDEX IF NOT EXISTS idx_chunks_user_doc ON document_chunks(user_id, document_id)",
+        # get_chat_history() walks (session_id, id) in either direction; the
+        # older session_id / (session_id, created_at) indexes only cost writes.
+        "DROP INDEX IF EXISTS idx_chat_session",
+        "DROP INDEX IF EXISTS idx_chat_session_created",
+        "CREATE INDEX IF NOT EXISTS idx_chat_session_id ON chat_messages(session_id, id)",
+        "CREATE INDEX IF NOT EXISTS idx_sq_active ON suggested_questions(is_active)",
+        "CREATE INDEX IF NOT EXISTS idx_subs_user_status ON subscriptions(user_id, status, current_period_end DESC)",
+        # Serves _warm_ip_signups(); per-IP counts are answered from memory.
+        "DROP INDEX IF EXISTS idx_users_signup_ip_created",
+        "CREATE INDEX IF NOT EXISTS idx_users_signup_recent ON users(created_at) "
+        "WHERE signup_ip IS NOT NULL AND signup_ip <> ''",
+        "CREATE INDEX IF NOT EXISTS idx_docs_uploaded ON documents(uploaded_at DESC)",
+        # Covers get_user_ready_documents() as an index-only scan.
+        "CREATE INDEX IF NOT EXISTS idx_docs_ready_user ON documents(user_id, uploaded_at DESC) "
+        "INCLUDE (id, title, original_filename, total_chunks) WHERE status = 'ready'",
+    ]
+    for stmt in index_statements:
+        await conn.execute(stmt)
+
+    # purchase_token must be unique for upsert_subscription's ON CONFLICT.
+    # Older rows could be duplicated by the former SELECT-then-INSERT race;
+    # keep the newest row per token before adding the constraint.
+    has_unique = await conn.fetchval(
+        "SELECT to_regclass('idx_subs_purchase_token_uniq') IS NOT NULL"
+    )
+    if not has_unique:
         await conn.execute("""
-            CREATE INDEX IF NOT EXISTS idx_chunks_fts
-            ON document_chunks USING GIN (to_tsvector('simple', content))
+            DELETE FROM subscriptions a USING subscriptions b
+            WHERE a.purchase_token = b.purchase_token AND a.id < b.id
         """)
+        await conn.execute("DROP INDEX IF EXISTS idx_subs_purchase_token")
+        await conn.execute(
+            "CREATE UNIQUE INDEX IF NOT EXISTS idx_subs_purchase_token_uniq "
+            "ON subscriptions(purchase_token)"
+        )
 
-        # ── Seed suggested questions ──
-        count = await conn.fetchval("SELECT COUNT(*) FROM suggested_questions")
-        if count == 0:
-            seed_questions = [
-                # ── Kodi i Procedurës Penale ──
-                ("Parimet themelore", "Cili është qëllimi i procedimit penal?", 1),
-                ("Parimet themelore", "Çfarë do të thotë prezumimi i pafajësisë?", 2),
-                ("Parimet themelore", "A lejohet gjykimi i një personi dy herë për të njëjtën vepër?", 3),
-                ("Gjykatat dhe juridiksioni", "Cilat janë gjykatat që shqyrtojnë çështjet penale?", 1),
-                ("Gjykatat dhe juridiksioni", "Si përcaktohet kompetenca territoriale e gjykatës?", 2),
-                ("Gjykatat dhe juridiksioni", "Kur gjykon një gjyqtar i vetëm?", 3),
-                ("Gjykatat dhe juridiksioni", "Kur kërkohet trup gjykues me tre gjyqtarë?", 4),
-                ("Gjykatat dhe juridiksioni", "Kur një gjyqtar është i papajtueshëm për të gjykuar?", 5),
-                ("Prokurori dhe policia gjyqësore", "Cili është roli i prokurorit në procedim penal?", 1),
-                ("Prokurori dhe policia gjyqësore", "Çfarë funksioni ka policia gjyqësore?", 2),
-                ("Prokurori dhe policia gjyqësore", "Kur prokurori mund të pushojë çështjen?", 3),
-                ("Prokurori dhe policia gjyqësore", "Si kontrollon prokurori veprimet e policisë gjyqësore?", 4),
-                ("Prokurori dhe policia gjyqësore", "Kur transferohet çështja në një prokurori tjetër?", 5),
-                ("I pandehuri dhe të drejtat", "Kur një person merr statusin e të pandehurit?", 1),
-                ("I pandehuri dhe të drejtat", "Cilat janë të drejtat themelore të të pandehurit?", 2),
-                ("I pandehuri dhe të drejtat", "A ka të drejtë i pandehuri të mos flasë?", 3),
-                ("I pandehuri dhe të drejtat", "Kur është e detyrueshme mbrojtja me avokat?", 4),
-                ("I pandehuri dhe të drejtat", "Çfarë të drejtash ka një person i arrestuar?", 5),
-                ("Provat dhe procedurat", "Si mblidhen provat në procedimin penal?", 1),
-                ("Provat dhe procedurat", "A mund të përdoren prova të paligjshme?", 2),
-                ("Provat dhe procedurat", "Çfarë janë provat në favor të të pandehurit?", 3),
-                ("Provat dhe procedurat", "Si bëhet marrja në pyetje e të pandehurit?", 4),
-                ("Provat dhe procedurat", "A lejohet përdorimi i dhunës për të marrë deklarime?", 5),
-                ("Masat e sigurimit", "Çfarë janë masat e sigurimit personal?", 1),
-                ("Masat e sigurimit", "Kur vendoset arresti me burg?", 2),
-                ("Masat e sigurimit", "Kur vendoset arresti në shtëpi?", 3),
-                ("Masat e sigurimit", "Cilat janë kushtet për ndalimin e personit?", 4),
-                ("Masat e sigurimit", "Si kontrollohet ligjshmëria e masës së sigurimit?", 5),
-                ("Hetimi paraprak", "Kur fillon hetimi penal?", 1),
-                ("Hetimi paraprak", "Çfarë roli ka prokurori në hetim?", 2),
-                ("Hetimi paraprak", "Sa zgjat hetimi paraprak?", 3),
-                ("Hetimi paraprak", "Kur pushohet hetimi?", 4),
-                ("Hetimi paraprak", "Kur çështja kalon për gjykim?", 5),
-                ("Gjykimi", "Cilat janë fazat e gjykimit?", 1),
-                ("Gjykimi", "Si paraqiten provat në gjykatë?", 2),
-                ("Gjykimi", "Kur jepet vendimi?", 3),
-                ("Gjykimi", "Çfarë përmban vendimi penal?", 4),
-                ("Mjetet e ankimit", "Çfarë është ankimi në apel?", 1),
-                ("Mjetet e ankimit", "Kur mund të bëhet rekurs në Gjykatën e Lartë?", 2),
-                ("Mjetet e ankimit", "Kush ka të drejtë të ankimojë vendimin?", 3),
-                ("Mjetet e ankimit", "Brenda çfarë afati bëhet ankimi?", 4),
-                ("Mjetet e ankimit", "Çfarë ndodh pas pranimit të ankimit?", 5),
-                ("Ekzekutimi i vendimit", "Si ekzekutohet një vendim penal?", 1),
-                ("Ekzekutimi i vendimit", "Kur fillon dënimi?", 2),
-                ("Ekzekutimi i vendimit", "A mund të pezullohet ekzekutimi i vendimit?", 3),
-                # ── Ligji për Nëpunësin Civil ──
-                ("Dispozita të Përgjithshme", "Cili është qëllimi i ligjit për nëpunësin civil?", 1),
-                ("Dispozita të Përgjithshme", "Çfarë rregullon marrëdhënia e shërbimit civil?", 2),
-                ("Dispozita të Përgjithshme", "Për kë zbatohet ky ligj në administratën publike?", 3),
-                ("Dispozita të Përgjithshme", "Cilat kategori përjashtohen nga zbatimi i ligjit?", 4),
-                ("Dispozita të Përgjithshme", "Çfarë kuptimi ka termi 'nëpunës civil'?", 5),
-                ("Administrimi i Shërbimit Civil", "Cilat janë parimet e administrimit të shërbimit civil?", 1),
-                ("Administrimi i Shërbimit Civil", "Çfarë roli ka Departamenti i Administratës Publike?", 2),
-                ("Administrimi i Shërbimit Civil", "Çfarë funksioni ka ASPA?", 3),
-                ("Administrimi i Shërbimit Civil", "Si organizohet njësia e burimeve njerëzore?", 4),
-                ("Administrimi i Shërbimit Civil", "Cilat janë detyrat e Komisionerit të Shërbimit Civil?", 5),
-                ("Dosjet dhe Planifikimi", "Çfarë përmban dosja individuale e nëpunësit civil?", 1),
-                ("Dosjet dhe Planifikimi", "Çfarë është regjistri qendror i personelit?", 2),
-                ("Dosjet dhe Planifikimi", "Si bëhet planifikimi i rekrutimit në shërbimin civil?", 3),
-                ("Klasifikimi i Pozicioneve", "Si klasifikohen pozicionet në shërbimin civil?", 1),
-                ("Klasifikimi i Pozicioneve", "Cilat janë kategoritë e nëpunësve civilë?", 2),
-                ("Klasifikimi i Pozicioneve", "Çfarë përfshin kategoria e lartë drejtuese?", 3),
-                ("Pranimi në Shërbimin Civil", "Cilat janë kërkesat për t'u bërë nëpunës civil?", 1),
-                ("Pranimi në Shërbimin Civil", "Si zhvillohet konkursi për nëpunës civil?", 2),
-                ("Pranimi në Shërbimin Civil", "Si bëhet vlerësimi i kandidatëve?", 3),
-                ("Pranimi në Shërbimin Civil", "Sa zgjat lista e fituesve?", 4),
-                ("Pranimi në Shërbimin Civil", "Çfarë është periudha e provës?", 5),
-                ("Lëvizja dhe Ngritja në Detyrë", "Çfarë është lëvizja paralele?", 1),
-                ("Lëvizja dhe Ngritja në Detyrë", "Si bëhet ngritja në detyrë?", 2),
-                ("Lëvizja dhe Ngritja në Detyrë", "Si plotësohen vendet e lira në administratë?", 3),
-                ("Të Drejtat e Nëpunësit Civil", "Cilat janë të drejtat kryesore të nëpunësit civil?", 1),
-                ("Të Drejtat e Nëpunësit Civil", "Si përbëhet paga e nëpunësit civil?", 2),
-                ("Të Drejtat e Nëpunësit Civil", "A ka të drejtë nëpunësi civil të bëjë grevë?", 3),
-                ("Të Drejtat e Nëpunësit Civil", "A ka të drejtë nëpunësi civil të marrë pjesë në politikë?", 4),
-                ("Detyrimet", "Cilat janë detyrimet e nëpunësit civil në punë?", 1),
-                # ── Kodi i Punës ──
-                ("Bazat dhe fusha e zbatimit", "Çfarë rregullon Kodi i Punës i Shqipërisë?", 1),
-                ("Bazat dhe fusha e zbatimit", "Në çfarë bazash ligjore mbështetet Kodi i Punës?", 2),
-                ("Bazat dhe fusha e zbatimit", "Në cilat raste zbatohet ligji shqiptar për kontratat e punës?", 3),
-                ("Bazat dhe fusha e zbatimit", "Si përcaktohet ligji që zbatohet për punëmarrës që punon në disa shtete?", 4),
-                ("Bazat dhe fusha e zbatimit", "Kur mund të zgjidhet një ligj tjetër për kontratën e punës?", 5),
-                ("Bazat dhe fusha e zbatimit", "Cilat kategori punësimi përjashtohen nga Kodi i Punës?", 6),
-                ("Bazat dhe fusha e zbatimit", "Si zbatohet Kodi për kontratat e lidhura para hyrjes në fuqi?", 7),
-                ("Bazat dhe fusha e zbatimit", "Çfarë është kompetenca territoriale në çështjet e punës?", 8),
-                ("Të drejtat themelore në punë", "Çfarë konsiderohet punë e detyruar?", 1),
-                ("Të drejtat themelore në punë", "Në cilat raste puna nuk konsiderohet e detyruar?", 2),
-                ("Të drejtat themelore në punë", "Çfarë ndalon ligji për diskriminimin në punë?", 3),
-                ("Të drejtat themelore në punë", "Çfarë konsiderohet diskriminim sipas Kodit të Punës?", 4),
-                ("Të drejtat themelore në punë", "Kur lejohet trajtim i ndryshëm pa u konsideruar diskriminim?", 5),
-                ("Të drejtat themelore në punë", "Çfarë detyrimesh ka punëdhënësi për barazinë në punë?", 6),
-                ("Të drejtat themelore në punë", "Çfarë të drejtash kanë punonjësit në lidhje me sindikatat?", 7),
-                ("Të drejtat themelore në punë", "Si mbrohen punonjësit që raportojnë shkelje ose korrupsion?", 8),
-                ("Burimet e marrëdhënies së punës", "Cilat janë burimet kryesore që rregullojnë marrëdhënien e punës?", 1),
-                ("Burimet e marrëdhënies së punës", "Çfarë ndodh kur një dispozitë bie ndesh me një ligj më të lartë?", 2),
-                ("Burimet e marrëdhënies së punës", "A mund të heqë dorë punëmarrësi nga të drejtat e tij?", 3),
-                ("Burimet e marrëdhënies së punës", "Çfarë roli kanë kontratat kolektive dhe individuale?", 4),
-                ("Kontrata e punës", "Çfarë është kontrata e punës?", 1),
-                ("Kontrata e punës", "Cilat janë elementet që duhet të përmbajë kontrata e punës?", 2),
-                ("Kontrata e punës", "Kur konsiderohet e lidhur një kontratë pune?", 3),
-                ("Kontrata e punës", "A është e detyrueshme forma e shkruar e kontratës?", 4),
-                ("Kontrata e punës", "Çfarë ndodh nëse kontrata nuk është lidhur me shkrim?", 5),
-                ("Kontrata e punës", "Çfarë është kontrata me kohë të pjesshme?", 6),
-                ("Kontrata e punës", "Çfarë të drejtash ka punonjësi me kohë të pjesshme?", 7),
-                ("Kontrata e punës", "Çfarë është telepuna dhe puna nga shtëpia?", 8),
-                ("Kontrata e punës", "Çfarë është kontrata e mësimit të profesionit?", 9),
-                ("Kontrata e punës", "Çfarë është kontrata e agjentit tregtar?", 10),
-                ("Punësimi i përkohshëm dhe agjencitë", "Çfarë është Agjencia e Punësimit të Përkohshëm?", 1),
-                ("Punësimi i përkohshëm dhe agjencitë", "Cilat janë të drejtat e punonjësve të punësuar nga agjencitë?", 2),
-                ("Punësimi i përkohshëm dhe agjencitë", "Sa mund të zgjasë një punësim i përkohshëm?", 3),
-                ("Punësimi i përkohshëm dhe agjencitë", "Kush paguan pagën e punonjësit të agjencisë?", 4),
-                ("Punësimi i përkohshëm dhe agjencitë", "Çfarë detyrimesh ka ndërmarrja pritëse?", 5),
-                ("Punësimi i përkohshëm dhe agjencitë", "Kur ndalohet përdorimi i punësimit të përkohshëm?", 6),
-                ("Detyrimet e punëmarrësit", "Çfarë detyrimi ka punëmarrësi për kryerjen e punës?", 1),
-                ("Detyrimet e punëmarrësit", "A duhet të zbatojë punëmarrësi çdo urdhër të punëdhënësit?", 2),
-                ("Detyrimet e punëmarrësit", "Kur punëmarrësi ka të drejtë të refuzojë urdhra?", 3),
-                ("Detyrimet e punëmarrësit", "Çfarë detyrimi ka punëmarrësi për kujdesin në punë?", 4),
-                ("Detyrimet e punëmarrësit", "Çfarë është detyrimi i besnikërisë ndaj punëdhënësit?", 5),
-                ("Detyrimet e punëmarrësit", "A lejohet punonjësi të punojë për konkurentë?", 6),
-                ("Detyrimet e punëmarrësit", "Çfarë përgjegjësie ka punëmarrësi për dëmet?", 7),
-                ("Ndalimi i konkurrencës", "Kur mund të ndalohet konkurrenca pas largimit nga puna?", 1),
-                ("Ndalimi i konkurrencës", "Sa mund të zgjasë ndalimi i konkurrencës?", 2),
-                ("Ndalimi i konkurrencës", "Çfarë kompensimi duhet të marrë punonjësi gjatë këtij ndalimi?", 3),
-                ("Ndalimi i konkurrencës", "Kur përfundon ndalimi i konkurrencës?", 4),
-                ("Ndalimi i konkurrencës", "Çfarë ndodh nëse punonjësi shkel marrëveshjen e konkurrencës?", 5),
-                ("Detyrimet e punëdhënësit", "Çfarë detyrimesh ka punëdhënësi për mbrojtjen e punonjësit?", 1),
-                ("Detyrimet e punëdhënësit", "Si mbrohen të dhënat personale të punëmarrësit?", 2),
-                # ── Kodi i Familjes ──
-                ("Parime të përgjithshme dhe të drejtat e fëmijës", "Cilat janë parimet bazë mbi të cilat mbështetet martesa dhe familja?", 1),
-                ("Parime të përgjithshme dhe të drejtat e fëmijës", "Çfarë nënkupton 'interesi më i lartë i fëmijës' dhe kur zbatohet?", 2),
-                ("Parime të përgjithshme dhe të drejtat e fëmijës", "Cilat janë detyrimet kryesore të prindërve ndaj fëmijëve?", 3),
-                ("Parime të përgjithshme dhe të drejtat e fëmijës", "A kanë fëmijët e lindur jashtë martese të njëjtat të drejta si ata të lindur nga martesa?", 4),
-                ("Parime të përgjithshme dhe të drejtat e fëmijës", "Çfarë të drejte ka i mituri për t'u dëgjuar në procedurat që e prekin?", 5),
-                ("Kushtet thelbësore për lidhjen e martesës", "Cila është mosha minimale për lidhjen e martesës?", 1),
-                ("Kushtet thelbësore për lidhjen e martesës", "Në cilat raste gjykata mund të lejojë martesë para moshës minimale?", 2),
-                ("Kushtet thelbësore për lidhjen e martesës", "Si kërkohet dhe vërtetohet pëlqimi i lirë i bashkëshortëve?", 3),
-                ("Kushtet thelbësore për lidhjen e martesës", "Kur ndalohet lidhja e një martese të re për shkak të një martese të mëparshme?", 4),
-                ("Kushtet thelbësore për lidhjen e martesës", "Cilat janë ndalimet e martesës për shkak të lidhjeve familjare (gjakësore)?", 5),
-                ("Ndalime të tjera për lidhjen e martesës", "A lejohet martesa midis vjehrrit dhe nuses apo vjehrrës dhe dhëndrit?", 1),
-                ("Ndalime të tjera për lidhjen e martesës", "A lejohet martesa midis njerkut dhe thjeshtrës?", 2),
-                ("Ndalime të tjera për lidhjen e martesës", "Kur ndalohet martesa për shkak të gjendjes mendore/psikike?", 3),
-                ("Ndalime të tjera për lidhjen e martesës", "Kur ndalohet martesa midis kujdestarit dhe personit në kujdestari?", 4),
-                ("Ndalime të tjera për lidhjen e martesës", "Si trajtohet martesa në rastet e birësimit (birësues/birësuar)?", 5),
-                ("Shpallja dhe procedura e lidhjes së martesës", "Çfarë është shpallja e martesës dhe pse bëhet?", 1),
-                ("Shpallja dhe procedura e lidhjes së martesës", "Ku bëhet shpallja e martesës kur bashkëshortët kanë vendbanime të ndryshme?", 2),
-                ("Shpallja dhe procedura e lidhjes së martesës", "Sa ditë duhet të kalojnë pas shpalljes përpara lidhjes së martesës?", 3),
-                ("Shpallja dhe procedura e lidhjes së martesës", "Çfarë dokumentesh kërkohen për shpalljen e martesës?", 4),
-                ("Shpallja dhe procedura e lidhjes së martesës", "Kur duhet bërë shpallje e re (p.sh. pas kalimit të afateve)?", 5),
-                ("Kundërshtimi i lidhjes së martesës", "Kush ka të drejtë të kundërshtojë lidhjen e martesës?", 1),
-                ("Kundërshtimi i lidhjes së martesës", "Si bëhet kundërshtimi dhe ku paraqitet?", 2),
-                ("Kundërshtimi i lidhjes së martesës", "Çfarë duhet të përmbajë akti i kundërshtimit?", 3),
-                ("Kundërshtimi i lidhjes së martesës", "Çfarë ndodh kur nëpunësi i gjendjes civile e pranon kundërshtimin si të rregullt?", 4),
-                ("Kundërshtimi i lidhjes së martesës", "Brenda çfarë afatesh vendos gjykata për heqjen ose jo të kundërshtimit?", 5),
-                ("Lidhja e martesës dhe refuzimi", "Si zhvillohet lidhja e martesës para nëpunësit të gjendjes civile?", 1),
-                ("Lidhja e martesës dhe refuzimi", "Çfarë roli kanë dëshmitarët në lidhjen e martesës?", 2),
-                ("Lidhja e martesës dhe refuzimi", "A mund të lidhet martesa pa shpallje? Në cilat raste?", 3),
-                ("Lidhja e martesës dhe refuzimi", "Në cilat raste nëpunësi i gjendjes civile mund të refuzojë lidhjen e martesës?", 4),
-                ("Lidhja e martesës dhe refuzimi", "Si ankimohet refuzimi i lidhjes së martesës?", 5),
-                ("Pavlefshmëria e martesës – shkaqet", "Kur konsiderohet martesa e pavlefshme për mungesë pëlqimi të lirë?", 1),
-                ("Pavlefshmëria e martesës – shkaqet", "Çfarë është 'lajthimi' në martesë dhe kur sjell pavlefshmëri?", 2),
-                ("Pavlefshmëria e martesës – shkaqet", "Kur pavlefshmëria lidhet me kanosje/kërcënim?", 3),
-                ("Pavlefshmëria e martesës – shkaqet", "Kur martesa është e pavlefshme për shkak të moshës?", 4),
-                ("Pavlefshmëria e martesës – shkaqet", "Kur martesa është e pavlefshme për shkak të ndalimeve (martesa e dytë, lidhjet, etj.)?", 5),
-                ("Pavlefshmëria – afatet dhe e drejta e padisë", "Kush ka të drejtë të ngrejë padi për pavlefshmërinë e martesës?", 1),
-                ("Pavlefshmëria – afatet dhe e drejta e padisë", "Cilat raste kanë afat parashkrimi dhe sa është afati?", 2),
-                ("Pavlefshmëria – afatet dhe e drejta e padisë", "A mund të ngrihet padi për pavlefshmëri edhe pas zgjidhjes së martesës?", 3),
-                ("Pavlefshmëria – afatet dhe e drejta e padisë", "A u kalon trashëgimtarëve e drejta e padisë për pavlefshmëri?", 4),
-                ("Pavlefshmëria – afatet dhe e drejta e padisë", "Cilat janë pasojat juridike kur martesa shpallet e pavlefshme?", 5),
-                ("Të drejtat dhe detyrimet reciproke të bashkëshortëve", "Cilat janë detyrimet reciproke të bashkëshortëve (besnikëri, ndihmë, bashkëpunim)?", 1),
-                ("Të drejtat dhe detyrimet reciproke të bashkëshortëve", "Si zgjidhet mbiemri i përbashkët i bashkëshortëve?", 2),
-                ("Të drejtat dhe detyrimet reciproke të bashkëshortëve", "Si përcaktohet mbiemri i fëmijëve kur prindërit kanë mbiemra të ndryshëm?", 3),
-                ("Të drejtat dhe detyrimet reciproke të bashkëshortëve", "Si përcaktohet vendbanimi i familjes kur ka mosmarrëveshje?", 4),
-                ("Të drejtat dhe detyrimet reciproke të bashkëshortëve", "Çfarë ndodh kur një bashkëshort largohet pa shkak nga vendbanimi familjar?", 5),
-                ("Banesa bashkëshortore, autorizime dhe masa urgjente", "A mund të disponohet banesa bashkëshortore pa pëlqimin e tjetrit?", 1),
-                ("Banesa bashkëshortore, autorizime dhe masa urgjente", "Në çfarë rrethanash gjykata mund të autorizojë një bashkëshort për veprime juridike?", 2),
-                ("Banesa bashkëshortore, autorizime dhe masa urgjente", "Kur lejohet përfaqësimi i bashkëshortit me autorizim gjyqësor?", 3),
-                ("Banesa bashkëshortore, autorizime dhe masa urgjente", "Çfarë masash urgjente mund të vendosë gjykata kur cenohen interesat e familjes?", 4),
-                ("Banesa bashkëshortore, autorizime dhe masa urgjente", "Çfarë mase urgjente parashikon Kodi në rast dhune në familje (largimi nga banesa)?", 5),
-                # ── Kodi Doganor ──
-                ("Garancitë (Nenet 85–88)", "Çfarë është garancia e detyrueshme dhe si caktohet shuma e saj?", 1),
-                ("Garancitë (Nenet 85–88)", "Kur autoritetet doganore e caktojnë garancinë në shumën maksimale?", 2),
-                ("Garancitë (Nenet 85–88)", "Si funksionon garancia globale dhe pse ndryshon në vlerë me kalimin e kohës?", 3),
-                ("Garancitë (Nenet 85–88)", "Kur depozitimi i garancisë është fakultativ, por autoritetet doganore prapë e kërkojnë?", 4),
-                ("Garancitë (Nenet 85–88)", "Cilat janë format e garancisë që mund të depozitohen?", 5),
-                ("Garancitë (Nenet 85–88)", "A paguhet interes kur garancia depozitohet 'cash'?", 6),
-                ("Garancitë (Nenet 85–88)", "A ka të drejtë personi të zgjedhë formën e garancisë?", 7),
-                ("Garancitë (Nenet 85–88)", "Kur autoritetet doganore mund ta refuzojnë formën e garancisë së zgjedhur?", 8),
-                ("Garancitë (Nenet 85–88)", "Në ç'rast autoritetet doganore mund të heqin dorë nga kërkesa për garanci?", 9),
-                ("Garancitë (Nenet 85–88)", "Çfarë do të thotë që garancia të mbulojë detyrimet gjatë gjithë kohës?", 10),
-                ("Ankimet (Nenet 44–45)", "Cilat ankime nuk trajtohen sipas neneve 45–46 kur ka vendim gjyqësor?", 1),
-                ("Ankimet (Nenet 44–45)", "Kush ka të drejtë ankimi kundër vendimeve doganore?", 2),
-                ("Ankimet (Nenet 44–45)", "Në cilat raste mund të ankimohet refuzimi i aplikimit ose anulimi/revokimi i një vendimi të favorshëm?", 3),
-                ("Ankimet (Nenet 44–45)", "A mund të ankimojë dikush edhe kur nuk është respektuar afati për marrjen e një vendimi të favorshëm?", 4),
-                ("Ankimet (Nenet 44–45)", "Cilat janë dy rrugët e ushtrimit të ankimit (administrativ dhe gjykatë)?", 5),
-                ("Ankimet (Nenet 44–45)", "Sa është afati 15-ditor për paraqitjen e ankimit dhe nga kur fillon?", 6),
-                ("Ankimet (Nenet 44–45)", "Brenda sa ditësh DPD vendos për pranimin ose jo të ankimit?", 7),
-                ("Ankimet (Nenet 44–45)", "Çfarë ndodh kur përfundon afati i vendimmarrjes dhe si ankimohet mosveprimi?", 8),
-                ("Borxhi doganor & parashkrimi (Neni 97)", "Pas sa kohësh nuk njoftohet më borxhi doganor ndaj debitorit?", 1),
-                ("Borxhi doganor & parashkrimi (Neni 97)", "Kur zgjatet parashkrimi në 5 deri 10 vjet?", 2),
-                ("Borxhi doganor & parashkrimi (Neni 97)", "Kur autoritetet doganore vënë në lëvizje organin e procedimit penal?", 3),
-                ("Borxhi doganor & parashkrimi (Neni 97)", "Kur pezullohen afatet e parashkrimit për shkak të një ankimi?", 4),
-                ("Borxhi doganor & parashkrimi (Neni 97)", "Si ndikon komunikimi i arsyeve para marrjes së vendimit te pezullimi i afateve?", 5),
-                ("Borxhi doganor & parashkrimi (Neni 97)", "Si ndikon një aplikim për rimbursim ose falje te afatet e parashkrimit?", 6),
-                ("Borxhi doganor & parashkrimi (Neni 97)", "Kur mund të njoftohet borxhi doganor në fund të një afati (maksimum 31 ditë)?", 7),
-                ("Transit kombëtar (Nenet 207–209)", "Cilat janë detyrimet kryesore të mbajtësit të transitit?", 1),
-                ("Transit kombëtar (Nenet 207–209)", "Çfarë do të thotë të paraqiten mallrat 'të paprekura' në doganën e destinacionit?", 2),
-                ("Transit kombëtar (Nenet 207–209)", "Kur konsiderohet i mbyllur regjimi i transitit?", 3),
-                ("Transit kombëtar (Nenet 207–209)", "Çfarë përgjegjësie ka transportuesi ose marrësi që pranon mallra duke e ditur që janë në transit?", 4),
-                ("Transit kombëtar (Nenet 207–209)", "Kur kërkohet depozitimi i një garancie për transitin?", 5),
-                ("Transit kombëtar (Nenet 207–209)", "Çfarë 'thjeshtimesh' mund të lejohen për transitin (p.sh. pritës i autorizuar, dokument transporti elektronik, etj.)?", 6),
-                ("Transit kombëtar (Nenet 207–209)", "Kur zbatohet transiti kombëtar i jashtëm për mallra që kalojnë në territor jashtë Shqipërisë?", 7),
-                ("Transit kombëtar (Nenet 207–209)", "Kur pezullohet procedura e transitit gjatë kalimit jashtë territorit doganor?", 8),
-                ("Transit kombëtar (Nenet 207–209)", "Çfarë përcaktohet me vendim të KM për rregullat zbatuese të transitit?", 9),
-                ("Magazinimi i përkohshëm (Neni 137) & deklarata", "Ku mund të magazinohen mallrat në magazinim të përkohshëm?", 1),
-                ("Magazinimi i përkohshëm (Neni 137) & deklarata", "Çfarë trajtimesh lejohen mbi mallrat në magazinim të përkohshëm?", 2),
-                ("Magazinimi i përkohshëm (Neni 137) & deklarata", "Kush është përgjegjës që mallrat të mos i shmangen mbikëqyrjes doganore?", 3),
-                ("Magazinimi i përkohshëm (Neni 137) & deklarata", "Çfarë detyrimesh ka mbajtësi i autorizimit/personi që magazinon mallrat?", 4),
-                ("Magazinimi i përkohshëm (Neni 137) & deklarata", "Çfarë ndodh kur mallrat nuk mund të mbahen në magazinë të përkohshme?", 5),
-                ("Magazinimi i përkohshëm (Neni 137) & deklarata", "Kur anulohet deklarata e magazinimit të përkohshëm nëse mallrat nuk paraqiten në doganë?", 6),
-                ("Magazinimi i përkohshëm (Neni 137) & deklarata", "Kur ndalohet ndryshimi i deklaratës pasi autoritetet njoftojnë kontroll ose konstatojnë pasaktësi?", 7),
-                ("Magazinimi doganor & përgjegjësitë (Nenet 214–215)", "Kur mund të autorizohet përpunimi në një magazinë doganore?", 1),
-                ("Magazinimi doganor & përgjegjësitë (Nenet 214–215)", "A konsiderohen këto mallra si të vendosura nën regjimin e magazinimit doganor?", 2),
-                ("Magazinimi doganor & përgjegjësitë (Nenet 214–215)", "Cilat janë përgjegjësitë e mbajtësit të autorizimit/mbajtësit të regjimit në magazinim doganor?", 3),
-                ("Magazinimi doganor & përgjegjësitë (Nenet 214–215)", "Kur magazina është publike, a mund t'i kalojnë përgjegjësitë vetëm mbajtësit të regjimit?", 4),
-                ("Magazinimi doganor & përgjegjësitë (Nenet 214–215)", "A lejohet zhvendosja e përkohshme e mallrave nga magazina doganore, dhe kur kërkohet autorizim?", 5),
-                ("Zonat e lira (Neni 216)", "Kush mund të përcaktojë zona të lira dhe çfarë përcaktohet për secilën zonë (planvendosje, hyrje/dalje)?", 1),
-                ("Zonat e lira (Neni 216)", "A është e detyrueshme që zonat e lira të jenë të rrethuara?", 2),
-                ("Mallrat ekuivalente (Neni 201)", "Çfarë janë mallrat ekuivalente dhe cilat kushte teknike/tregtare duhet të plotësojnë?", 1),
-                ("Mallrat ekuivalente (Neni 201)", "Në cilat regjime autorizohet përdorimi i mallrave ekuivalente (magazinim doganor, zonë e lirë, end-use, përpunim, etj.)?", 2),
-            ]
-            await conn.executemany(
-                "INSERT INTO suggested_questions (category, question, sort_order) "
-                "VALUES ($1, $2, $3) ON CONFLICT DO NOTHING",
-                seed_questions,
-            )
+    # GIN index for full-text search on chunk content
+    await conn.execute(_CHUNKS_FTS_INDEX_SQL)
 
-    logger.info("Database initialized successfully")
+    # RUM index (optional extension) lets ranked FTS use an index-ordered scan
+    try:
+        async with conn.transaction():
+            await conn.execute("CREATE EXTENSION IF NOT EXISTS rum")
+            await conn.execute(_CHUNKS_RUM_INDEX_SQL)
+    except Exception as e:
+        logger.info(f"RUM index unavailable, ranking FTS via GIN + ts_rank: {e}")
+
+    # pg_prewarm (optional) lets init_db load the search indexes into
+    # shared buffers before the first query.
+    try:
+        async with conn.transaction():
+            await conn.execute("CREATE EXTENSION IF NOT EXISTS pg_prewarm")
+    except Exception as e:
+        logger.info(f"pg_prewarm unavailable, search indexes warm on demand: {e}")
+
+    # ── Materialized row counters (maintained by triggers) ──
+    await _init_app_counters(conn)
+
+    # ── Seed suggested questions ──
+    count = await conn.fetchval("SELECT COUNT(*) FROM suggested_questions")
+    if count == 0:
+        seed_questions = [
+            # ── Kodi i Procedurës Penale ──
+            ("Parimet themelore", "Cili është qëllimi i procedimit penal?", 1),
+            ("Parimet themelore", "Çfarë do të thotë prezumimi i pafajësisë?", 2),
+            ("Parimet themelore", "A lejohet gjykimi i një personi dy herë për të njëjtën vepër?", 3),
+            ("Gjykatat dhe juridiksioni", "Cilat janë gjykatat që shqyrtojnë çështjet penale?", 1),
+            ("Gjykatat dhe juridiksioni", "Si përcaktohet kompetenca territoriale e gjykatës?", 2),
+            ("Gjykatat dhe juridiksioni", "Kur gjykon një gjyqtar i vetëm?", 3),
+            ("Gjykatat dhe juridiksioni", "Kur kërkohet trup gjykues me tre gjyqtarë?", 4),
+            ("Gjykatat dhe juridiksioni", "Kur një gjyqtar është i papajtueshëm për të gjykuar?", 5),
+            ("Prokurori dhe policia gjyqësore", "Cili është roli i prokurorit në procedim penal?", 1),
+            ("Prokurori dhe policia gjyqësore", "Çfarë funksioni ka policia gjyqësore?", 2),
+            ("Prokurori dhe policia gjyqësore", "Kur prokurori mund të pushojë çështjen?", 3),
+            ("Prokurori dhe policia gjyqësore", "Si kontrollon prokurori veprimet e policisë gjyqësore?", 4),
+            ("Prokurori dhe policia gjyqësore", "Kur transferohet çështja në një prokurori tjetër?", 5),
+            ("I pandehuri dhe të drejtat", "Kur një person merr statusin e të pandehurit?", 1),
+            ("I pandehuri dhe të drejtat", "Cilat janë të drejtat themelore të të pandehurit?", 2),
+            ("I pandehuri dhe të drejtat", "A ka të drejtë i pandehuri të mos flasë?", 3),
+            ("I pandehuri dhe të drejtat", "Kur është e detyrueshme mbrojtja me avokat?", 4),
+            ("I pandehuri dhe të drejtat", "Çfarë të drejtash ka një person i arrestuar?", 5),
+            ("Provat dhe procedurat", "Si mblidhen provat në procedimin penal?", 1),
+            ("Provat dhe procedurat", "A mund të përdoren prova të paligjshme?", 2),
+            ("Provat dhe procedurat", "Çfarë janë provat në favor të të pandehurit?", 3),
+            ("Provat dhe procedurat", "Si bëhet marrja në pyetje e të pandehurit?", 4),
+            ("Provat dhe procedurat", "A lejohet përdorimi i dhunës për të marrë deklarime?", 5),
+            ("Masat e sigurimit", "Çfarë janë masat e sigurimit personal?", 1),
+            ("Masat e sigurimit", "Kur vendoset arresti me burg?", 2),
+            ("Masat e sigurimit", "Kur vendoset arresti në shtëpi?", 3),
+            ("Masat e sigurimit", "Cilat janë kushtet për ndalimin e personit?", 4),
+            ("Masat e sigurimit", "Si kontrollohet ligjshmëria e masës së sigurimit?", 5),
+            ("Hetimi paraprak", "Kur fillon hetimi penal?", 1),
+            ("Hetimi paraprak", "Çfarë roli ka prokurori në hetim?", 2),
+            ("Hetimi paraprak", "Sa zgjat hetimi paraprak?", 3),
+            ("Hetimi paraprak", "Kur pushohet hetimi?", 4),
+            ("Hetimi paraprak", "Kur çështja kalon për gjykim?", 5),
+            ("Gjykimi", "Cilat janë fazat e gjykimit?", 1),
+            ("Gjykimi", "Si paraqiten provat në gjykatë?", 2),
+            ("Gjykimi", "Kur jepet vendimi?", 3),
+            ("Gjykimi", "Çfarë përmban vendimi penal?", 4),
+            ("Mjetet e ankimit", "Çfarë është ankimi në apel?", 1),
+            ("Mjetet e ankimit", "Kur mund të bëhet rekurs në Gjykatën e Lartë?", 2),
+            ("Mjetet e ankimit", "Kush ka të drejtë të ankimojë vendimin?", 3),
+            ("Mjetet e ankimit", "Brenda çfarë afati bëhet ankimi?", 4),
+            ("Mjetet e ankimit", "Çfarë ndodh pas pranimit të ankimit?", 5),
+            ("Ekzekutimi i vendimit", "Si ekzekutohet një vendim penal?", 1),
+            ("Ekzekutimi i vendimit", "Kur fillon dënimi?", 2),
+            ("Ekzekutimi i vendimit", "A mund të pezullohet ekzekutimi i vendimit?", 3),
+            # ── Ligji për Nëpunësin Civil ──
+            ("Dispozita të Përgjithshme", "Cili është qëllimi i ligjit për nëpunësin civil?", 1),
+            ("Dispozita të Përgjithshme", "Çfarë rregullon marrëdhënia e shërbimit civil?", 2),
+            ("Dispozita të Përgjithshme", "Për kë zbatohet ky ligj në administratën publike?", 3),
+            ("Dispozita të Përgjithshme", "Cilat kategori përjashtohen nga zbatimi i ligjit?", 4),
+            ("Dispozita të Përgjithshme", "Çfarë kuptimi ka termi 'nëpunës civil'?", 5),
+            ("Administrimi i Shërbimit Civil", "Cilat janë parimet e administrimit të shërbimit civil?", 1),
+            ("Administrimi i Shërbimit Civil", "Çfarë roli ka Departamenti i Administratës Publike?", 2),
+            ("Administrimi i Shërbimit Civil", "Çfarë funksioni ka ASPA?", 3),
+            ("Administrimi i Shërbimit Civil", "Si organizohet njësia e burimeve njerëzore?", 4),
+            ("Administrimi i Shërbimit Civil", "Cilat janë detyrat e Komisionerit të Shërbimit Civil?", 5),
+            ("Dosjet dhe Planifikimi", "Çfarë përmban dosja individuale e nëpunësit civil?", 1),
+            ("Dosjet dhe Planifikimi", "Çfarë është regjistri qendror i personelit?", 2),
+            ("Dosjet dhe Planifikimi", "Si bëhet planifikimi i rekrutimit në shërbimin civil?", 3),
+            ("Klasifikimi i Pozicioneve", "Si klasifikohen pozicionet në shërbimin civil?", 1),
+            ("Klasifikimi i Pozicioneve", "Cilat janë kategoritë e nëpunësve civilë?", 2),
+            ("Klasifikimi i Pozicioneve", "Çfarë përfshin kategoria e lartë drejtuese?", 3),
+            ("Pranimi në Shërbimin Civil", "Cilat janë kërkesat për t'u bërë nëpunës civil?", 1),
+            ("Pranimi në Shërbimin Civil", "Si zhvillohet konkursi për nëpunës civil?", 2),
+            ("Pranimi në Shërbimin Civil", "Si bëhet vlerësimi i kandidatëve?", 3),
+            ("Pranimi në Shërbimin Civil", "Sa zgjat lista e fituesve?", 4),
+            ("Pranimi në Shërbimin Civil", "Çfarë është periudha e provës?", 5),
+            ("Lëvizja dhe Ngritja në Detyrë", "Çfarë është lëvizja paralele?", 1),
+            ("Lëvizja dhe Ngritja në Detyrë", "Si bëhet ngritja në detyrë?", 2),
+            ("Lëvizja dhe Ngritja në Detyrë", "Si plotësohen vendet e lira në administratë?", 3),
+            ("Të Drejtat e Nëpunësit Civil", "Cilat janë të drejtat kryesore të nëpunësit civil?", 1),
+            ("Të Drejtat e Nëpunësit Civil", "Si përbëhet paga e nëpunësit civil?", 2),
+            ("Të Drejtat e Nëpunësit Civil", "A ka të drejtë nëpunësi civil të bëjë grevë?", 3),
+            ("Të Drejtat e Nëpunësit Civil", "A ka të drejtë nëpunësi civil të marrë pjesë në politikë?", 4),
+            ("Detyrimet", "Cilat janë detyrimet e nëpunësit civil në punë?", 1),
+            # ── Kodi i Punës ──
+            ("Bazat dhe fusha e zbatimit", "Çfarë rregullon Kodi i Punës i Shqipërisë?", 1),
+            ("Bazat dhe fusha e zbatimit", "Në çfarë bazash ligjore mbështetet Kodi i Punës?", 2),
+            ("Bazat dhe fusha e zbatimit", "Në cilat raste zbatohet ligji shqiptar për kontratat e punës?", 3),
+            ("Bazat dhe fusha e zbatimit", "Si përcaktohet ligji që zbatohet për punëmarrës që punon në disa shtete?", 4),
+            ("Bazat dhe fusha e zbatimit", "Kur mund të zgjidhet një ligj tjetër për kontratën e punës?", 5),
+            ("Bazat dhe fusha e zbatimit", "Cilat kategori punësimi përjashtohen nga Kodi i Punës?", 6),
+            ("Bazat dhe fusha e zbatimit", "Si zbatohet Kodi për kontratat e lidhura para hyrjes në fuqi?", 7),
+            ("Bazat dhe fusha e zbatimit", "Çfarë është kompetenca territoriale në çështjet e punës?", 8),
+            ("Të drejtat themelore në punë", "Çfarë konsiderohet punë e detyruar?", 1),
+            ("Të drejtat themelore në punë", "Në cilat raste puna nuk konsiderohet e detyruar?", 2),
+            ("Të drejtat themelore në punë", "Çfarë ndalon ligji për diskriminimin në punë?", 3),
+            ("Të drejtat themelore në punë", "Çfarë konsiderohet diskriminim sipas Kodit të Punës?", 4),
+            ("Të drejtat themelore në punë", "Kur lejohet trajtim i ndryshëm pa u konsideruar diskriminim?", 5),
+            ("Të drejtat themelore në punë", "Çfarë detyrimesh ka punëdhënësi për barazinë në punë?", 6),
+            ("Të drejtat themelore në punë", "Çfarë të drejtash kanë punonjësit në lidhje me sindikatat?", 7),
+            ("Të drejtat themelore në punë", "Si mbrohen punonjësit që raportojnë shkelje ose korrupsion?", 8),
+            ("Burimet e marrëdhënies së punës", "Cilat janë burimet kryesore që rregullojnë marrëdhënien e punës?", 1),
+            ("Burimet e marrëdhënies së punës", "Çfarë ndodh kur një dispozitë bie ndesh me një ligj më të lartë?", 2),
+            ("Burimet e marrëdhënies së punës", "A mund të heqë dorë punëmarrësi nga të drejtat e tij?", 3),
+            ("Burimet e marrëdhënies së punës", "Çfarë roli kanë kontratat kolektive dhe individuale?", 4),
+            ("Kontrata e punës", "Çfarë është kontrata e punës?", 1),
+            ("Kontrata e punës", "Cilat janë elementet që duhet të përmbajë kontrata e punës?", 2),
+            ("Kontrata e punës", "Kur konsiderohet e lidhur një kontratë pune?", 3),
+            ("Kontrata e punës", "A është e detyrueshme forma e shkruar e kontratës?", 4),
+            ("Kontrata e punës", "Çfarë ndodh nëse kontrata nuk është lidhur me shkrim?", 5),
+            ("Kontrata e punës", "Çfarë është kontrata me kohë të pjesshme?", 6),
+            ("Kontrata e punës", "Çfarë të drejtash ka punonjësi me kohë të pjesshme?", 7),
+            ("Kontrata e punës", "Çfarë është telepuna dhe puna nga shtëpia?", 8),
+            ("Kontrata e punës", "Çfarë është kontrata e mësimit të profesionit?", 9),
+            ("Kontrata e punës", "Çfarë është kontrata e agjentit tregtar?", 10),
+            ("Punësimi i përkohshëm dhe agjencitë", "Çfarë është Agjencia e Punësimit të Përkohshëm?", 1),
+            ("Punësimi i përkohshëm dhe agjencitë", "Cilat janë të drejtat e punonjësve të punësuar nga agjencitë?", 2),
+            ("Punësimi i përkohshëm dhe agjencitë", "Sa mund të zgjasë një punësim i përkohshëm?", 3),
+            ("Punësimi i përkohshëm dhe agjencitë", "Kush paguan pagën e punonjësit të agjencisë?", 4),
+            ("Punësimi i përkohshëm dhe agjencitë", "Çfarë detyrimesh ka ndërmarrja pritëse?", 5),
+            ("Punësimi i përkohshëm dhe agjencitë", "Kur ndalohet përdorimi i punësimit të përkohshëm?", 6),
+            ("Detyrimet e punëmarrësit", "Çfarë detyrimi ka punëmarrësi për kryerjen e punës?", 1),
+            ("Detyrimet e punëmarrësit", "A duhet të zbatojë punëmarrësi çdo urdhër të punëdhënësit?", 2),
+            ("Detyrimet e punëmarrësit", "Kur punëmarrësi ka të drejtë të refuzojë urdhra?", 3),
+            ("Detyrimet e punëmarrësit", "Çfarë detyrimi ka punëmarrësi për kujdesin në punë?", 4),
+            ("Detyrimet e punëmarrësit", "Çfarë është detyrimi i besnikërisë ndaj punëdhënësit?", 5),
+            ("Detyrimet e punëmarrësit", "A lejohet punonjësi të punojë për konkurentë?", 6),
+            ("Detyrimet e punëmarrësit", "Çfarë përgjegjësie ka punëmarrësi për dëmet?", 7),
+            ("Ndalimi i konkurrencës", "Kur mund të ndalohet konkurrenca pas largimit nga puna?", 1),
+            ("Ndalimi i konkurrencës", "Sa mund të zgjasë ndalimi i konkurrencës?", 2),
+            ("Ndalimi i konkurrencës", "Çfarë kompensimi duhet të marrë punonjësi gjatë këtij ndalimi?", 3),
+            ("Ndalimi i konkurrencës", "Kur përfundon ndalimi i konkurrencës?", 4),
+            ("Ndalimi i konkurrencës", "Çfarë ndodh nëse punonjësi shkel marrëveshjen e konkurrencës?", 5),
+            ("Detyrimet e punëdhënësit", "Çfarë detyrimesh ka punëdhënësi për mbrojtjen e punonjësit?", 1),
+            ("Detyrimet e punëdhënësit", "Si mbrohen të dhënat personale të punëmarrësit?", 2),
+            # ── Kodi i Familjes ──
+            ("Parime të përgjithshme dhe të drejtat e fëmijës", "Cilat janë parimet bazë mbi të cilat mbështetet martesa dhe familja?", 1),
+            ("Parime të përgjithshme dhe të drejtat e fëmijës", "Çfarë nënkupton 'interesi më i lartë i fëmijës' dhe kur zbatohet?", 2),
+            ("Parime të përgjithshme dhe të drejtat e fëmijës", "Cilat janë detyrimet kryesore të prindërve ndaj fëmijëve?", 3),
+            ("Parime të përgjithshme dhe të drejtat e fëmijës", "A kanë fëmijët e lindur jashtë martese të njëjtat të drejta si ata të lindur nga martesa?", 4),
+            ("Parime të përgjithshme dhe të drejtat e fëmijës", "Çfarë të drejte ka i mituri për t'u dëgjuar në procedurat që e prekin?", 5),
+            ("Kushtet thelbësore për lidhjen e martesës", "Cila është mosha minimale për lidhjen e martesës?", 1),
+            ("Kushtet thelbësore për lidhjen e martesës", "Në cilat raste gjykata mund të lejojë martesë para moshës minimale?", 2),
+            ("Kushtet thelbësore për lidhjen e martesës", "Si kërkohet dhe vërtetohet pëlqimi i lirë i bashkëshortëve?", 3),
+            ("Kushtet thelbësore për lidhjen e martesës", "Kur ndalohet lidhja e një martese të re për shkak të një martese të mëparshme?", 4),
+            ("Kushtet thelbësore për lidhjen e martesës", "Cilat janë ndalimet e martesës për shkak të lidhjeve familjare (gjakësore)?", 5),
+            ("Ndalime të tjera për lidhjen e martesës", "A lejohet martesa midis vjehrrit dhe nuses apo vjehrrës dhe dhëndrit?", 1),
+            ("Ndalime të tjera për lidhjen e martesës", "A lejohet martesa midis njerkut dhe thjeshtrës?", 2),
+            ("Ndalime të tjera për lidhjen e martesës", "Kur ndalohet martesa për shkak të gjendjes mendore/psikike?", 3),
+            ("Ndalime të tjera për lidhjen e martesës", "Kur ndalohet martesa midis kujdestarit dhe personit në kujdestari?", 4),
+            ("Ndalime të tjera për lidhjen e martesës", "Si trajtohet martesa në rastet e birësimit (birësues/birësuar)?", 5),
+            ("Shpallja dhe procedura e lidhjes së martesës", "Çfarë është shpallja e martesës dhe pse bëhet?", 1),
+            ("Shpallja dhe procedura e lidhjes së martesës", "Ku bëhet shpallja e martesës kur bashkëshortët kanë vendbanime të ndryshme?", 2),
+            ("Shpallja dhe procedura e lidhjes së martesës", "Sa ditë duhet të kalojnë pas shpalljes përpara lidhjes së martesës?", 3),
+            ("Shpallja dhe procedura e lidhjes së martesës", "Çfarë dokumentesh kërkohen për shpalljen e martesës?", 4),
+            ("Shpallja dhe procedura e lidhjes së martesës", "Kur duhet bërë shpallje e re (p.sh. pas kalimit të afateve)?", 5),
+            ("Kundërshtimi i lidhjes së martesës", "Kush ka të drejtë të kundërshtojë lidhjen e martesës?", 1),
+            ("Kundërshtimi i lidhjes së martesës", "Si bëhet kundërshtimi dhe ku paraqitet?", 2),
+            ("Kundërshtimi i lidhjes së martesës", "Çfarë duhet të përmbajë akti i kundërshtimit?", 3),
+            ("Kundërshtimi i lidhjes së martesës", "Çfarë ndodh kur nëpunësi i gjendjes civile e pranon kundërshtimin si të rregullt?", 4),
+            ("Kundërshtimi i lidhjes së martesës", "Brenda çfarë afatesh vendos gjykata për heqjen ose jo të kundërshtimit?", 5),
+            ("Lidhja e martesës dhe refuzimi", "Si zhvillohet lidhja e martesës para nëpunësit të gjendjes civile?", 1),
+            ("Lidhja e martesës dhe refuzimi", "Çfarë roli kanë dëshmitarët në lidhjen e martesës?", 2),
+            ("Lidhja e martesës dhe refuzimi", "A mund të lidhet martesa pa shpallje? Në cilat raste?", 3),
+            ("Lidhja e martesës dhe refuzimi", "Në cilat raste nëpunësi i gjendjes civile mund të refuzojë lidhjen e martesës?", 4),
+            ("Lidhja e martesës dhe refuzimi", "Si ankimohet refuzimi i lidhjes së martesës?", 5),
+            ("Pavlefshmëria e martesës – shkaqet", "Kur konsiderohet martesa e pavlefshme për mungesë pëlqimi të lirë?", 1),
+            ("Pavlefshmëria e martesës – shkaqet", "Çfarë është 'lajthimi' në martesë dhe kur sjell pavlefshmëri?", 2),
+            ("Pavlefshmëria e martesës – shkaqet", "Kur pavlefshmëria lidhet me kanosje/kërcënim?", 3),
+            ("Pavlefshmëria e martesës – shkaqet", "Kur martesa është e pavlefshme për shkak të moshës?", 4),
+            ("Pavlefshmëria e martesës – shkaqet", "Kur martesa është e pavlefshme për shkak të ndalimeve (martesa e dytë, lidhjet, etj.)?", 5),
+            ("Pavlefshmëria – afatet dhe e drejta e padisë", "Kush ka të drejtë të ngrejë padi për pavlefshmërinë e martesës?", 1),
+            ("Pavlefshmëria – afatet dhe e drejta e padisë", "Cilat raste kanë afat parashkrimi dhe sa është afati?", 2),
+            ("Pavlefshmëria – afatet dhe e drejta e padisë", "A mund të ngrihet padi për pavlefshmëri edhe pas zgjidhjes së martesës?", 3),
+            ("Pavlefshmëria – afatet dhe e drejta e padisë", "A u kalon trashëgimtarëve e drejta e padisë për pavlefshmëri?", 4),
+            ("Pavlefshmëria – afatet dhe e drejta e padisë", "Cilat janë pasojat juridike kur martesa shpallet e pavlefshme?", 5),
+            ("Të drejtat dhe detyrimet reciproke të bashkëshortëve", "Cilat janë detyrimet reciproke të bashkëshortëve (besnikëri, ndihmë, bashkëpunim)?", 1),
+            ("Të drejtat dhe detyrimet reciproke të bashkëshortëve", "Si zgjidhet mbiemri i përbashkët i bashkëshortëve?", 2),
+            ("Të drejtat dhe detyrimet reciproke të bashkëshortëve", "Si përcaktohet mbiemri i fëmijëve kur prindërit kanë mbiemra të ndryshëm?", 3),
+            ("Të drejtat dhe detyrimet reciproke të bashkëshortëve", "Si përcaktohet vendbanimi i familjes kur ka mosmarrëveshje?", 4),
+            ("Të drejtat dhe detyrimet reciproke të bashkëshortëve", "Çfarë ndodh kur një bashkëshort largohet pa shkak nga vendbanimi familjar?", 5),
+            ("Banesa bashkëshortore, autorizime dhe masa urgjente", "A mund të disponohet banesa bashkëshortore pa pëlqimin e tjetrit?", 1),
+            ("Banesa bashkëshortore, autorizime dhe masa urgjente", "Në çfarë rrethanash gjykata mund të autorizojë një bashkëshort për veprime juridike?", 2),
+            ("Banesa bashkëshortore, autorizime dhe masa urgjente", "Kur lejohet përfaqësimi i bashkëshortit me autorizim gjyqësor?", 3),
+            ("Banesa bashkëshortore, autorizime dhe masa urgjente", "Çfarë masash urgjente mund të vendosë gjykata kur cenohen interesat e familjes?", 4),
+            ("Banesa bashkëshortore, autorizime dhe masa urgjente", "Çfarë mase urgjente parashikon Kodi në rast dhune në familje (largimi nga banesa)?", 5),
+            # ── Kodi Doganor ──
+            ("Garancitë (Nenet 85–88)", "Çfarë është garancia e detyrueshme dhe si caktohet shuma e saj?", 1),
+            ("Garancitë (Nenet 85–88)", "Kur autoritetet doganore e caktojnë garancinë në shumën maksimale?", 2),
+            ("Garancitë (Nenet 85–88)", "Si funksionon garancia globale dhe pse ndryshon në vlerë me kalimin e kohës?", 3),
+            ("Garancitë (Nenet 85–88)", "Kur depozitimi i garancisë është fakultativ, por autoritetet doganore prapë e kërkojnë?", 4),
+            ("Garancitë (Nenet 85–88)", "Cilat janë format e garancisë që mund të depozitohen?", 5),
+            ("Garancitë (Nenet 85–88)", "A paguhet interes kur garancia depozitohet 'cash'?", 6),
+            ("Garancitë (Nenet 85–88)", "A ka të drejtë personi të zgjedhë formën e garancisë?", 7),
+            ("Garancitë (Nenet 85–88)", "Kur autoritetet doganore mund ta refuzojnë formën e garancisë së zgjedhur?", 8),
+            ("Garancitë (Nenet 85–88)", "Në ç'rast autoritetet doganore mund të heqin dorë nga kërkesa për garanci?", 9),
+            ("Garancitë (Nenet 85–88)", "Çfarë do të thotë që garancia të mbulojë detyrimet gjatë gjithë kohës?", 10),
+            ("Ankimet (Nenet 44–45)", "Cilat ankime nuk trajtohen sipas neneve 45–46 kur ka vendim gjyqësor?", 1),
+            ("Ankimet (Nenet 44–45)", "Kush ka të drejtë ankimi kundër vendimeve doganore?", 2),
+            ("Ankimet (Nenet 44–45)", "Në cilat raste mund të ankimohet refuzimi i aplikimit ose anulimi/revokimi i një vendimi të favorshëm?", 3),
+            ("Ankimet (Nenet 44–45)", "A mund të ankimojë dikush edhe kur nuk është respektuar afati për marrjen e një vendimi të favorshëm?", 4),
+            ("Ankimet (Nenet 44–45)", "Cilat janë dy rrugët e ushtrimit të ankimit (administrativ dhe gjykatë)?", 5),
+            ("Ankimet (Nenet 44–45)", "Sa është afati 15-ditor për paraqitjen e ankimit dhe nga kur fillon?", 6),
+            ("Ankimet (Nenet 44–45)", "Brenda sa ditësh DPD vendos për pranimin ose jo të ankimit?", 7),
+            ("Ankimet (Nenet 44–45)", "Çfarë ndodh kur përfundon afati i vendimmarrjes dhe si ankimohet mosveprimi?", 8),
+            ("Borxhi doganor & parashkrimi (Neni 97)", "Pas sa kohësh nuk njoftohet më borxhi doganor ndaj debitorit?", 1),
+            ("Borxhi doganor & parashkrimi (Neni 97)", "Kur zgjatet parashkrimi në 5 deri 10 vjet?", 2),
+            ("Borxhi doganor & parashkrimi (Neni 97)", "Kur autoritetet doganore vënë në lëvizje organin e procedimit penal?", 3),
+            ("Borxhi doganor & parashkrimi (Neni 97)", "Kur pezullohen afatet e parashkrimit për shkak të një ankimi?", 4),
+            ("Borxhi doganor & parashkrimi (Neni 97)", "Si ndikon komunikimi i arsyeve para marrjes së vendimit te pezullimi i afateve?", 5),
+            ("Borxhi doganor & parashkrimi (Neni 97)", "Si ndikon një aplikim për rimbursim ose falje te afatet e parashkrimit?", 6),
+            ("Borxhi doganor & parashkrimi (Neni 97)", "Kur mund të njoftohet borxhi doganor në fund të një afati (maksimum 31 ditë)?", 7),
+            ("Transit kombëtar (Nenet 207–209)", "Cilat janë detyrimet kryesore të mbajtësit të transitit?", 1),
+            ("Transit kombëtar (Nenet 207–209)", "Çfarë do të thotë të paraqiten mallrat 'të paprekura' në doganën e destinacionit?", 2),
+            ("Transit kombëtar (Nenet 207–209)", "Kur konsiderohet i mbyllur regjimi i transitit?", 3),
+            ("Transit kombëtar (Nenet 207–209)", "Çfarë përgjegjësie ka transportuesi ose marrësi që pranon mallra duke e ditur që janë në transit?", 4),
+            ("Transit kombëtar (Nenet 207–209)", "Kur kërkohet depozitimi i një garancie për transitin?", 5),
+            ("Transit kombëtar (Nenet 207–209)", "Çfarë 'thjeshtimesh' mund të lejohen për transitin (p.sh. pritës i autorizuar, dokument transporti elektronik, etj.)?", 6),
+            ("Transit kombëtar (Nenet 207–209)", "Kur zbatohet transiti kombëtar i jashtëm për mallra që kalojnë në territor jashtë Shqipërisë?", 7),
+            ("Transit kombëtar (Nenet 207–209)", "Kur pezullohet procedura e transitit gjatë kalimit jashtë territorit doganor?", 8),
+            ("Transit kombëtar (Nenet 207–209)", "Çfarë përcaktohet me vendim të KM për rregullat zbatuese të transitit?", 9),
+            ("Magazinimi i përkohshëm (Neni 137) & deklarata", "Ku mund të magazinohen mallrat në magazinim të përkohshëm?", 1),
+            ("Magazinimi i përkohshëm (Neni 137) & deklarata", "Çfarë trajtimesh lejohen mbi mallrat në magazinim të përkohshëm?", 2),
+            ("Magazinimi i përkohshëm (Neni 137) & deklarata", "Kush është përgjegjës që mallrat të mos i shmangen mbikëqyrjes doganore?", 3),
+            ("Magazinimi i përkohshëm (Neni 137) & deklarata", "Çfarë detyrimesh ka mbajtësi i autorizimit/personi që magazinon mallrat?", 4),
+            ("Magazinimi i përkohshëm (Neni 137) & deklarata", "Çfarë ndodh kur mallrat nuk mund të mbahen në magazinë të përkohshme?", 5),
+            ("Magazinimi i përkohshëm (Neni 137) & deklarata", "Kur anulohet deklarata e magazinimit të përkohshëm nëse mallrat nuk paraqiten në doganë?", 6),
+            ("Magazinimi i përkohshëm (Neni 137) & deklarata", "Kur ndalohet ndryshimi i deklaratës pasi autoritetet njoftojnë kontroll ose konstatojnë pasaktësi?", 7),
+            ("Magazinimi doganor & përgjegjësitë (Nenet 214–215)", "Kur mund të autorizohet përpunimi në një magazinë doganore?", 1),
+            ("Magazinimi doganor & përgjegjësitë (Nenet 214–215)", "A konsiderohen këto mallra si të vendosura nën regjimin e magazinimit doganor?", 2),
+            ("Magazinimi doganor & përgjegjësitë (Nenet 214–215)", "Cilat janë përgjegjësitë e mbajtësit të autorizimit/mbajtësit të regjimit në magazinim doganor?", 3),
+            ("Magazinimi doganor & përgjegjësitë (Nenet 214–215)", "Kur magazina është publike, a mund t'i kalojnë përgjegjësitë vetëm mbajtësit të regjimit?", 4),
+            ("Magazinimi doganor & përgjegjësitë (Nenet 214–215)", "A lejohet zhvendosja e përkohshme e mallrave nga magazina doganore, dhe kur kërkohet autorizim?", 5),
+            ("Zonat e lira (Neni 216)", "Kush mund të përcaktojë zona të lira dhe çfarë përcaktohet për secilën zonë (planvendosje, hyrje/dalje)?", 1),
+            ("Zonat e lira (Neni 216)", "A është e detyrueshme që zonat e lira të jenë të rrethuara?", 2),
+            ("Mallrat ekuivalente (Neni 201)", "Çfarë janë mallrat ekuivalente dhe cilat kushte teknike/tregtare duhet të plotësojnë?", 1),
+            ("Mallrat ekuivalente (Neni 201)", "Në cilat regjime autorizohet përdorimi i mallrave ekuivalente (magazinim doganor, zonë e lirë, end-use, përpunim, etj.)?", 2),
+        ]
+        await conn.executemany(
+            "INSERT INTO suggested_questions (category, question, sort_order) "
+            "VALUES ($1, $2, $3) ON CONFLICT DO NOTHING",
+            seed_questions,
+        )
 
 
 # ── Document CRUD ──────────────────────────────────────────────
 
+_DOCUMENT_COLUMNS = (
+    "id, user_id, filename, original_filename, file_type, file_size, title, "
+    "law_number, law_date, status, total_chunks, page_count, error_message, "
+    "metadata_json, storage_bucket, storage_path, uploaded_at, processed_at"
+)
+
 async def create_document(user_id: int, filename: str, original_filename: str,
                           file_type: str, file_size: int,
                           title: str = None, law_number: str = None,
                           law_date: str = None,
                           storage_bucket: str = "Ligje",
                           storage_path: str = None) -> int:
-    pool = await _get_pool()
-    async with pool.acquire() as conn:
-        row = await conn.fetchrow(
-            """INSERT INTO documents
-               (user_id, filename, original_filename, file_type, file_size,
-                title, law_number, law_date, storage_bucket, storage_path, status)
-               VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, 'processing')
-               RETURNING id""",
-            user_id, filename, original_filename, file_type, file_size,
-            title, law_number, law_date, storage_bucket, storage_path,
-        )
-        return row["id"]
+    pool = _executor()
+    new_id = await pool.fetchval(
+        """INSERT INTO documents
+           (user_id, filename, original_filename, file_type, file_size,
+            title, law_number, law_date, storage_bucket, storage_path, status)
+           VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, 'processing')
+           RETURNING id""",
+        user_id, filename, original_filename, file_type, file_size,
+        title, law_number, law_date, storage_bucket, storage_path,
+    )
+    return new_id
 
 
 async def update_document_status(doc_id: int, status: str,
                                   total_chunks: int = None,
                                   error_message: str = None,
                                   metadata: dict = None):
-    pool = await _get_pool()
-    parts = ["status = $1"]
-    values: list = [status]
-    idx = 2
-
-    if total_chunks is not None:
-        parts.append(f"total_chunks = ${idx}"); values.append(total_chunks); idx += 1
-    if error_message is not None:
-        parts.append(f"error_message = ${idx}"); values.append(error_message); idx += 1
-    if metadata is not None:
-        parts.append(f"metadata_json = ${idx}"); values.append(json.dumps(metadata)); idx += 1
-        if metadata.get("title"):
-            parts.append(f"title = COALESCE(NULLIF(title, ''), ${idx})")
-            values.append(metadata["title"]); idx += 1
-        if metadata.get("law_number"):
-            parts.append(f"law_number = COALESCE(NULLIF(law_number, ''), ${idx})")
-            values.append(metadata["law_number"]); idx += 1
-        if metadata.get("law_date"):
-            parts.append(f"law_date = COALESCE(NULLIF(law_date, ''), ${idx})")
-            values.append(metadata["law_date"]); idx += 1
-    if status in ("ready", "failed"):
-        parts.append(f"processed_at = ${idx}")
-        values.append(datetime.utcnow()); idx += 1
-
-    values.append(doc_id)
-    query = f"UPDATE documents SET {', '.join(parts)} WHERE id = ${idx}"
-    async with pool.acquire() as conn:
-        await conn.execute(query, *values)
+    # One fixed statement for every combination of arguments, so each pool
+    # connection prepares it once.  NULL parameters leave the column as is;
+    # extracted title/law fields only fill columns that are still blank.
+    # A repeated bare status change (e.g. a late callback) matches no row,
+    # so Postgres writes no new tuple version.
+    meta = metadata or {}
+    pool = _executor()
+    await pool.execute(
+        """UPDATE documents SET
+               status        = $1,
+               total_chunks  = COALESCE($2, total_chunks),
+               error_message = COALESCE($3, error_message),
+               metadata_json = COALESCE($4, metadata_json),
+               title         = COALESCE(NULLIF(title, ''), $5, title),
+               law_number    = COALESCE(NULLIF(law_number, ''), $6, law_number),
+               law_date      = COALESCE(NULLIF(law_date, ''), $7, law_date),
+               processed_at  = CASE WHEN $1 IN ('ready', 'failed')
+                                    THEN NOW() ELSE processed_at END
+           WHERE id = $8
+             AND (status IS DISTINCT FROM $1 OR $2::int IS NOT NULL
+                  OR $3::text IS NOT NULL OR $4::text IS NOT NULL)""",
+        status, total_chunks, error_message,
+        _json_dumps(metadata) if metadata is not None else None,
+        meta.get("title") or None,
+        meta.get("law_number") or None,
+        meta.get("law_date") or None,
+        doc_id,
+    )
+
+
+async def get_all_documents() -> list[asyncpg.Record]:
+    """All documents, newest first.
+
+    Records are returned as-is: they support ``[]``/``.get()`` like a dict
+    and FastAPI serializes them directly, so no per-row dict is built.
+    """
+    pool = _executor()
+    return await pool.fetch(
+        f"SELECT {_DOCUMENT_COLUMNS} FROM documents ORDER BY uploaded_at DESC"
+    )
+
+
+async def get_user_documents(user_id: int) -> list[asyncpg.Record]:
+    pool = _executor()
+    return await pool.fetch(
+        f"SELECT {_DOCUMENT_COLUMNS} FROM documents WHERE user_id = $1 ORDER BY uploaded_at DESC",
+        user_id,
+    )
+
+
+async def get_user_ready_documents(user_id: int) -> list[asyncpg.Record]:
+    pool = _executor()
+    return await pool.fetch(
+        """SELECT id, title, original_filename, total_chunks, uploaded_at
+           FROM documents WHERE user_id = $1 AND status = 'ready'
+           ORDER BY uploaded_at DESC""",
+        user_id,
+    )
+
+
+async def get_all_ready_documents() -> list[asyncpg.Record]:
+    pool = _executor()
+    return await pool.fetch(
+        """SELECT id, user_id, title, original_filename, total_chunks
+           FROM documents WHERE status = 'ready'
+           ORDER BY uploaded_at DESC"""
+    )
+
+
+async def has_ready_documents(user_id: int = None) -> bool:
+    """True if any ready document exists (optionally for one user)."""
+    pool = _executor()
+    if user_id is None:
+        return await pool.fetchval(
+            "SELECT EXISTS (SELECT 1 FROM documents WHERE status = 'ready')"
+        )
+    return await pool.fetchval(
+        "SELECT EXISTS (SELECT 1 FROM documents WHERE user_id = $1 AND status = 'ready')",
+        user_id,
+    )
 
 
-async def get_all_documents():
-    pool = await _get_pool()
-    async with pool.acquire() as conn:
-        rows = await conn.fetch("SELECT * FROM documents ORDER BY uploaded_at DESC")
-        return [dict(r) for r in rows]
+async def get_document_counts() -> dict:
+    """Total and ready document counts in one aggregate."""
+    pool = _executor()
+    row = await pool.fetchrow(
+        """SELECT COUNT(*) AS total,
+                  COUNT(*) FILTER (WHERE status = 'ready') AS ready
+           FROM documents"""
+    )
+    return {"total": row["total"], "ready": row["ready"]}
 
 
-async def get_user_documents(user_id: int):
-    pool = await _get_pool()
-    async with pool.acquire() as conn:
-        rows = await conn.fetch(
-            "SELECT * FROM documents WHERE user_id = $1 ORDER BY uploaded_at DESC",
-            user_id,
-        )
-        return [dict(r) for r in rows]
-
+async def get_document(doc_id: int):
+    pool = _executor()
+    row = await pool.fetchrow(
+        f"SELECT {_DOCUMENT_COLUMNS} FROM documents WHERE id = $1", doc_id
+    )
+    return dict(row) if row else None
 
-async def get_user_ready_documents(user_id: int):
-    pool = await _get_pool()
-    async with pool.acquire() as conn:
-        rows = await conn.fetch(
-            """SELECT id, title, original_filename, total_chunks, uploaded_at
-               FROM documents WHERE user_id = $1 AND status = 'ready'
-               ORDER BY uploaded_at DESC""",
-            user_id,
-        )
-        return [dict(r) for r in rows]
 
+async def get_document_for_user(doc_id: int, user_id: int):
+    pool = _executor()
+    row = await pool.fetchrow(
+        f"SELECT {_DOCUMENT_COLUMNS} FROM documents WHERE id = $1 AND user_id = $2",
+        doc_id, user_id,
+    )
+    return dict(row) if row else None
 
-async def get_all_ready_documents():
-    pool = await _get_pool()
-    async with pool.acquire() as conn:
-        rows = await conn.fetch(
-            """SELECT id, user_id, title, original_filename, total_chunks
-               FROM documents WHERE status = 'ready'
-               ORDER BY uploaded_at DESC"""
-        )
-        return [dict(r) for r in rows]
 
+async def delete_document(doc_id: int):
+    await delete_document_bulk([doc_id])
 
-async def get_document(doc_id: int):
-    pool = await _get_pool()
-    async with pool.acquire() as conn:
-        row = await conn.fetchrow("SELECT * FROM documents WHERE id = $1", doc_id)
-        return dict(row) if row else None
 
+async def _delete_documents(conn: asyncpg.Connection, doc_ids: list[int]) -> int:
+    status = await conn.execute(
+        "DELETE FROM document_chunks WHERE document_id = ANY($1::int[])",
+        doc_ids,
+    )
+    await conn.execute(
+        "DELETE FROM documents WHERE id = ANY($1::int[])", doc_ids
+    )
+    # Status is "DELETE <rows>".
+    return int(status.split()[-1])
 
-async def get_document_for_user(doc_id: int, user_id: int):
-    pool = await _get_pool()
-    async with pool.acquire() as conn:
-        row = await conn.fetchrow(
-            "SELECT * FROM documents WHERE id = $1 AND user_id = $2",
-            doc_id, user_id,
-        )
-        return dict(row) if row else None
 
+async def delete_document_bulk(doc_ids: list[int]):
+    """Delete documents and their chunks in a single transaction.
 
-async def delete_document(doc_id: int):
-    pool = await _get_pool()
-    async with pool.acquire() as conn:
-        await conn.execute("DELETE FROM documents WHERE id = $1", doc_id)
+    Chunks are removed with one ``ANY($1)`` statement before the parent
+    rows, so the ON DELETE CASCADE has nothing left to do.  Dead GIN
+    entries are left for autovacuum.
+    """
+    if not doc_ids:
+        return
+    async with _pool_sync().acquire() as conn:
+        async with conn.transaction():
+            await conn.execute("SET LOCAL synchronous_commit = off")
+            chunk_count = await _delete_documents(conn, doc_ids)
+    logger.info(f"Deleted {len(doc_ids)} documents ({chunk_count} chunks)")
 
 
 async def count_user_documents(user_id: int) -> int:
-    pool = await _get_pool()
-    async with pool.acquire() as conn:
-        return await conn.fetchval(
-            "SELECT COUNT(*) FROM documents WHERE user_id = $1", user_id
-        )
+    return await _read_counter(f"documents:user:{user_id}")
 
 
 async def rename_document(doc_id: int, new_title: str):
-    pool = await _get_pool()
-    async with pool.acquire() as conn:
-        await conn.execute(
-            "UPDATE documents SET title = $1 WHERE id = $2",
-            new_title.strip(), doc_id,
-        )
+    pool = _executor()
+    await pool.execute(
+        "UPDATE documents SET title = $1 WHERE id = $2 AND title IS DISTINCT FROM $1",
+        new_title.strip(), doc_id,
+    )
 
 
 async def update_document_page_count(doc_id: int, page_count: int):
-    pool = await _get_pool()
-    async with pool.acquire() as conn:
-        await conn.execute(
-            "UPDATE documents SET page_count = $1 WHERE id = $2",
-            page_count, doc_id,
-        )
+    pool = _executor()
+    await pool.execute(
+        "UPDATE documents SET page_count = $1 WHERE id = $2",
+        page_count, doc_id,
+    )
 
 
 # ── Document Chunks (for keyword search) ──────────────────────
 
+_CHUNK_COPY_COLUMNS = (
+    "document_id", "user_id", "chunk_index", "content", "article",
+    "section_title", "pages", "page_start", "page_end", "char_count",
+)
+
+
 async def insert_chunks(document_id: int, user_id: int, chunks: list[dict]):
-    pool = await _get_pool()
-    async with pool.acquire() as conn:
-        records = []
-        for c in chunks:
-            pages_str = ",".join(str(p) for p in c.get("pages", []))
-            page_list = c.get("pages", [])
-            records.append((
-                document_id, user_id, c.get("chunk_index", 0),
-                c["text"], c.get("article") or "",
-                c.get("section_title") or "",
-                pages_str,
-                min(page_list) if page_list else 0,
-                max(page_list) if page_list else 0,
-                len(c["text"]),
-            ))
-        await conn.executemany(
-            """INSERT INTO document_chunks
-               (document_id, user_id, chunk_index, content, article,
-                section_title, pages, page_start, page_end, char_count)
-               VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10)""",
-            records,
-        )
+    """Bulk-load a document's chunks with a single COPY.
+
+    COPY streams every row in one statement (atomic on its own), which is
+    far cheaper per row than INSERT for the hundreds of chunks a law yields.
+    """
+    if not chunks:
+        return
+    records = []
+    for c in chunks:
+        page_list = c.get("pages") or []
+        text = c["text"]
+        records.append((
+            document_id, user_id, c.get("chunk_index", 0),
+            text, c.get("article") or "",
+            c.get("section_title") or "",
+            ",".join(map(str, page_list)),
+            min(page_list) if page_list else 0,
+            max(page_list) if page_list else 0,
+            len(text),
+        ))
+    await _executor().copy_records_to_table(
+        "document_chunks",
+        records=records,
+        columns=_CHUNK_COPY_COLUMNS,
+    )
 
 
 async def delete_chunks_for_document(document_id: int):
-    pool = await _get_pool()
-    async with pool.acquire() as conn:
-        await conn.execute(
-            "DELETE FROM document_chunks WHERE document_id = $1", document_id
-        )
+    pool = _executor()
+    await pool.execute(
+        "DELETE FROM document_chunks WHERE document_id = $1", document_id
+    )
+
+
+# ts_rank weights, in array order {D, C, B, A}.  Only two labels are set:
+# the chunk body is D (0.1, the Postgres default) and the article heading is
+# A (1.0), so a query term naming the article outranks body mentions by 10x.
+# B and C are unused and weighted 0.
+_FTS_RANK_WEIGHTS = "{0.1, 0, 0, 1.0}"
+
+# With RUM, this many index-ordered candidates per requested row are
+# re-ranked with the weighted rank.
+_RUM_CANDIDATE_FACTOR = 4
+_RUM_MIN_CANDIDATES = 100
+
+_CHUNK_META_COLUMNS = (
+    "dc.id, dc.document_id, dc.user_id, dc.chunk_index, dc.article, "
+    "dc.section_title, dc.pages, dc.page_start, dc.page_end, dc.char_count"
+)
 
 
 async def keyword_search_chunks(query: str, user_id: int = None,
                                  document_id: int = None,
-                                 limit: int = 30) -> list[dict]:
-    """Full-text keyword search using PostgreSQL tsvector."""
-    pool = await _get_pool()
+                                 limit: int = 30,
+                                 include_content: bool = True) -> list[dict]:
+    """Full-text keyword search using PostgreSQL tsvector.
+
+    With ``include_content=False`` only chunk metadata and ``fts_rank`` are
+    returned; fetch the text later via get_chunks_by_ids().
+    """
+    pool = _executor()
     tsquery = _build_pg_tsquery(query)
     if not tsquery:
         return []
@@ -640,28 +1023,70 @@ async def keyword_search_chunks(query: str, user_id: int = None,
     if document_id:
         where_parts.append(f"dc.document_id = ${idx}"); params.append(document_id); idx += 1
 
-    params.append(limit)
     where_clause = " AND ".join(where_parts)
+    columns = _CHUNK_META_COLUMNS + (", dc.content" if include_content else "")
+    source = "document_chunks dc"
+    if _use_rum:
+        # RUM distance operator: the planner walks the index in content-rank
+        # order and stops after a candidate pool, which is then re-ranked by
+        # the article-weighted fts_rank below so scores and order agree.
+        params.append(max(limit * _RUM_CANDIDATE_FACTOR, _RUM_MIN_CANDIDATES))
+        source = f"""(
+            SELECT dc.* FROM document_chunks dc
+            WHERE {where_clause}
+            ORDER BY to_tsvector('simple', dc.content) <=> to_tsquery('simple', $1)
+            LIMIT ${idx}
+        ) dc"""
+        where_clause = "TRUE"
+        idx += 1
+    params.append(limit)
 
+    # Ranking only touches matched rows, so the heading vector is built
+    # for those alone; the WHERE clause still uses the content index.
     sql = f"""
-        SELECT dc.*,
-               ts_rank(to_tsvector('simple', dc.content),
+        SELECT {columns},
+               ts_rank('{_FTS_RANK_WEIGHTS}',
+                       setweight(to_tsvector('simple', COALESCE(dc.article, '')), 'A')
+                       || setweight(to_tsvector('simple', dc.content), 'D'),
                        to_tsquery('simple', $1)) AS fts_rank
-        FROM document_chunks dc
+        FROM {source}
         WHERE {where_clause}
         ORDER BY fts_rank DESC
         LIMIT ${idx}
     """
 
     try:
-        async with pool.acquire() as conn:
-            rows = await conn.fetch(sql, *params)
-            return [dict(r) for r in rows]
+        rows = await pool.fetch(sql, *params)
+        return [dict(r) for r in rows]
     except Exception as e:
         logger.warning(f"FTS query failed: {e}")
         return []
 
 
+async def get_chunks_by_ids(chunk_ids: list[int], user_id: int | None) -> dict[int, str]:
+    """Fetch chunk content for the given ids in one round trip.
+
+    Pass the ``user_id`` the ids were searched with: it keeps the fetch
+    scoped to that tenant, like the search that produced the ids.
+    ``None`` means the search was global, as in keyword_search_chunks().
+    """
+    if not chunk_ids:
+        return {}
+    pool = _executor()
+    if user_id is None:
+        rows = await pool.fetch(
+            "SELECT id, content FROM document_chunks WHERE id = ANY($1::int[])",
+            chunk_ids,
+        )
+    else:
+        rows = await pool.fetch(
+            "SELECT id, content FROM document_chunks "
+            "WHERE id = ANY($1::int[]) AND user_id = $2",
+            chunk_ids, user_id,
+        )
+    return {r["id"]: r["content"] for r in rows}
+
+
 # ── Albanian FTS helpers ──────────────────────────────────────
 
 _ALBANIAN_STOPWORDS = frozenset(
@@ -738,21 +1163,107 @@ for _root, _variants in _STEM_FAMILIES.items():
         _WORD_TO_STEM[_v] = _root
 
 
+# Roots shorter than this are too generic to stand in for their family as
+# a prefix term ('pun:*' matches almost every work-related word).
+_MIN_PREFIX_ROOT = 5
+
+
+def _stem_group(root: str, family: list[str]) -> str:
+    """tsquery for a stem family: ``root:*`` plus only the irregular forms.
+
+    Variants that start with the root are already matched by the prefix
+    term, so listing them would only widen the OR the index has to union.
+    Short roots keep their explicit variants and get no prefix term.
+    """
+    if len(root) < _MIN_PREFIX_ROOT:
+        return "(" + " | ".join(family) + ")"
+    irregular = [v for v in family if not v.startswith(root)]
+    if not irregular:
+        return f"{root}:*"
+    return "(" + " | ".join(irregular) + f" | {root}:*)"
+
+
+# Pre-built tsquery group per stem root, e.g. "tatim:*" or "(prone | ... | pronesi:*)".
+_STEM_GROUPS: dict[str, str] = {
+    root: _stem_group(root, family) for root, family in _STEM_FAMILIES.items()
+}
+
+_RE_WORD = re.compile(r'\b\w{2,}\b')
+
+# Case and definiteness endings a stem root may carry and still be the same
+# word.  Anything else after the root (-or, -onjes, ...) forms a new word.
+_INFLECTIONAL_SUFFIXES = frozenset((
+    'a', 'e', 'ë', 'i', 'n', 's', 't', 'at', 'en', 'ën', 'es', 'ës', 'et',
+    'ët', 'ia', 'in', 'it', 'ja', 'je', 'ne', 'në', 'se', 'së', 've',
+    'ave', 'eve', 'ine', 'inë', 'ise', 'isë', 'jen', 'jes', 'jet', 'jeve',
+))
+
+
+def _build_stem_automaton():
+    """Compile the stem roots into an Aho–Corasick automaton (if available)."""
+    if ahocorasick is None:
+        return None
+    automaton = ahocorasick.Automaton()
+    for root in _STEM_FAMILIES:
+        automaton.add_word(root, root)
+    automaton.make_automaton()
+    return automaton
+
+
+_STEM_AUTOMATON = _build_stem_automaton()
+
+
+def _match_stem_prefixes(query_lower: str) -> dict[int, str]:
+    """Map word start offsets to the longest stem root inflecting that word.
+
+    Catches suffixed forms that are not enumerated in _STEM_FAMILIES
+    (e.g. 'tatimeve' → 'tatim', 'ligjeve' → 'ligj').  A word only
+    collapses to a root when the rest of it is a known inflectional
+    suffix, so derived words such as 'drejtori' or 'punonjes' keep their
+    own prefix term instead of matching the whole family.
+    """
+    candidates: dict[int, list[str]] = {}
+    if _STEM_AUTOMATON is not None:
+        for end, root in _STEM_AUTOMATON.iter(query_lower):
+            start = end - len(root) + 1
+            if start > 0 and query_lower[start - 1].isalnum():
+                continue
+            candidates.setdefault(start, []).append(root)
+    hits: dict[int, str] = {}
+    for m in _RE_WORD.finditer(query_lower):
+        word = m.group(0)
+        if _STEM_AUTOMATON is not None:
+            roots = candidates.get(m.start(), ())
+        else:
+            roots = [root for root in _STEM_FAMILIES if word.startswith(root)]
+        for root in sorted(roots, key=len, reverse=True):
+            if word[len(root):] in _INFLECTIONAL_SUFFIXES:
+                hits[m.start()] = root
+                break
+    return hits
+
+
 def _build_pg_tsquery(query: str) -> str:
     """Build a PostgreSQL tsquery string with Albanian stemming."""
+    return _build_pg_tsquery_lower(query.strip().lower())
+
+
+@lru_cache(maxsize=1024)
+def _build_pg_tsquery_lower(query_lower: str) -> str:
+    # Pure function of the lowered query (stopwords/stems are module
+    # constants), so repeated and suggested questions are a cache hit.
     tokens = []
-    words = re.findall(r'\b\w{2,}\b', query)
+    prefix_roots = _match_stem_prefixes(query_lower)
     seen = set()
-    for w in words:
-        wl = w.lower()
+    for m in _RE_WORD.finditer(query_lower):
+        wl = m.group(0)
         if wl in _ALBANIAN_STOPWORDS or wl in seen:
             continue
         seen.add(wl)
 
-        stem_root = _WORD_TO_STEM.get(wl)
+        stem_root = _WORD_TO_STEM.get(wl) or prefix_roots.get(m.start())
         if stem_root:
-            family = _STEM_FAMILIES[stem_root]
-            tokens.append("(" + " | ".join(family) + ")")
+            tokens.append(_STEM_GROUPS[stem_root])
         else:
             if len(wl) >= 4:
                 tokens.append(f"{wl}:*")
@@ -764,33 +1275,227 @@ def _build_pg_tsquery(query: str) -> str:
 
 # ── Chat CRUD ──────────────────────────────────────────────────
 
-async def save_chat_message(session_id: str, role: str, content: str,
-                            sources: list = None):
-    pool = await _get_pool()
-    async with pool.acquire() as conn:
-        await conn.execute(
-            """INSERT INTO chat_messages (session_id, role, content, sources_json)
-               VALUES ($1, $2, $3, $4)""",
-            session_id, role, content, json.dumps(sources or []),
-        )
+# Messages are queued and written in batches by a background task started
+# from init_db().  Each queued row carries a future that save_chat_message()
+# awaits, so a failed write reaches the caller instead of being dropped, and
+# get_chat_history() waits only for its own session's pending rows.
+_CHAT_BATCH_MAX = 64
+_CHAT_FLUSH_INTERVAL = 0.05  # seconds to wait for more rows before writing
+_chat_queue: asyncio.Queue | None = None
+_chat_writer_task: asyncio.Task | None = None
+_chat_pending: dict[str, set[asyncio.Future]] = {}
 
 
-async def get_chat_history(session_id: str, limit: int = 20):
-    pool = await _get_pool()
+async def _write_chat_rows(rows: list[tuple]):
+    pool = _pool_sync()
     async with pool.acquire() as conn:
-        rows = await conn.fetch(
-            """SELECT * FROM chat_messages
-               WHERE session_id = $1
-               ORDER BY created_at DESC LIMIT $2""",
+        async with conn.transaction():
+            # Chat history tolerates losing the last few ms on a server crash;
+            # skip waiting for the WAL flush on this hot write path.
+            await conn.execute("SET LOCAL synchronous_commit = off")
+            await conn.executemany(
+                """INSERT INTO chat_messages (session_id, role, content, sources_json)
+                   VALUES ($1, $2, $3, $4)""",
+                rows,
+            )
+
+
+async def _write_chat_batch(batch: list[tuple[tuple, asyncio.Future]]):
+    try:
+        await _write_chat_rows([row for row, _ in batch])
+    except Exception as e:
+        logger.warning(f"Batched write of {len(batch)} chat messages failed, "
+                       f"retrying one by one: {e}")
+        # One bad row must not sink the rest; whatever still fails is
+        # raised to the caller that saved it.
+        for row, fut in batch:
+            try:
+                await _write_chat_rows([row])
+            except Exception as row_error:
+                if not fut.done():
+                    fut.set_exception(row_error)
+            else:
+                if not fut.done():
+                    fut.set_result(None)
+        return
+    for _, fut in batch:
+        if not fut.done():
+            fut.set_result(None)
+
+
+async def _chat_writer():
+    loop = asyncio.get_running_loop()
+    while True:
+        batch = [await _chat_queue.get()]
+        deadline = loop.time() + _CHAT_FLUSH_INTERVAL
+        while len(batch) < _CHAT_BATCH_MAX:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(_chat_queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        try:
+            await _write_chat_batch(batch)
+        finally:
+            for _ in batch:
+                _chat_queue.task_done()
+
+
+def _start_chat_writer():
+    global _chat_queue, _chat_writer_task
+    if _chat_writer_task is None or _chat_writer_task.done():
+        _chat_queue = asyncio.Queue()
+        _chat_writer_task = asyncio.create_task(_chat_writer())
+
+
+async def flush_chat(session_id: str | None = None):
+    """Wait until queued chat messages have been written.
+
+    With ``session_id`` only that session's pending rows are awaited;
+    without it, the whole queue (used on shutdown).
+    """
+    if _chat_queue is None or not _chat_writer_task or _chat_writer_task.done():
+        return
+    if session_id is None:
+        await _chat_queue.join()
+        return
+    pending = _chat_pending.get(session_id)
+    if pending:
+        await asyncio.gather(*pending, return_exceptions=True)
+
+
+def _forget_pending(session_id: str, fut: asyncio.Future):
+    pending = _chat_pending.get(session_id)
+    if pending is not None:
+        pending.discard(fut)
+        if not pending:
+            del _chat_pending[session_id]
+
+
+async def save_chat_message(session_id: str, role: str, content: str,
+                            sources: list = None):
+    row = (session_id, role, content, _json_dumps(sources or []))
+    if _chat_writer_task is None or _chat_writer_task.done():
+        await _write_chat_rows([row])
+        return
+    fut = asyncio.get_running_loop().create_future()
+    _chat_pending.setdefault(session_id, set()).add(fut)
+    fut.add_done_callback(lambda f: _forget_pending(session_id, f))
+    _chat_queue.put_nowait((row, fut))
+    # Shielded so a cancelled request doesn't cancel the shared future;
+    # the row is still written.
+    await asyncio.shield(fut)
+
+
+async def get_chat_history(session_id: str, limit: int = 20,
+                           include_sources: bool = True,
+                           after_id: int | None = None):
+    """Return session messages oldest first.
+
+    Without ``after_id`` this is the last ``limit`` messages; with it, the
+    next ``limit`` messages whose id is greater (incremental fetch).  With
+    ``include_sources`` each message carries a decoded ``sources`` list;
+    pass ``include_sources=False`` when only role/content are needed (LLM
+    context) to skip fetching and decoding the sources_json blob.
+    """
+    await flush_chat(session_id)
+    pool = _executor()
+    columns = "id, role, content, created_at"
+    if include_sources:
+        columns += ", sources_json"
+    if after_id is not None:
+        rows = await pool.fetch(
+            f"""SELECT {columns} FROM chat_messages
+                WHERE session_id = $1 AND id > $2
+                ORDER BY id LIMIT $3""",
+            session_id, after_id, limit,
+        )
+    else:
+        # Walk idx_chat_session_id backwards for the newest rows, then
+        # flip the (small) result in SQL.
+        rows = await pool.fetch(
+            f"""SELECT * FROM (
+                    SELECT {columns} FROM chat_messages
+                    WHERE session_id = $1
+                    ORDER BY id DESC LIMIT $2
+                ) recent ORDER BY id""",
             session_id, limit,
         )
-        results = [dict(r) for r in rows]
-        results.reverse()
-        return results
+    results = [dict(r) for r in rows]
+    if include_sources:
+        for msg in results:
+            msg["sources"] = _json_loads(msg.pop("sources_json"), [])
+    return results
+
+
+# ── Hot-read cache (users / subscriptions) ───────────────────
+#
+# get_user_by_* and get_active_subscription run on nearly every
+# authenticated request; their rows change rarely.  Entries live for
+# _READ_CACHE_TTL seconds and are dropped by every write helper below.
+# Callers get a shallow copy, so mutating the returned dict is safe.
+
+_READ_CACHE_TTL = 30
+_READ_CACHE_MAX = 4096
+_read_cache: dict[tuple, tuple[float, dict | None]] = {}
+_read_locks: dict[tuple, asyncio.Lock] = {}
+
+
+def _cache_put(key: tuple, value):
+    """Store a read-cache entry, evicting the oldest once at _READ_CACHE_MAX."""
+    if key not in _read_cache and len(_read_cache) >= _READ_CACHE_MAX:
+        _read_cache.pop(next(iter(_read_cache)), None)
+    _read_cache[key] = (time.monotonic() + _READ_CACHE_TTL, value)
+
+
+async def _cached_read(key: tuple, loader):
+    if _current_conn.get() is not None:
+        # Inside transaction(): may see uncommitted rows, never cache them.
+        value = await loader()
+        return dict(value) if value else None
+    hit = _read_cache.get(key)
+    if hit and hit[0] > time.monotonic():
+        return dict(hit[1]) if hit[1] else None
+    lock = _read_locks.setdefault(key, asyncio.Lock())
+    async with lock:
+        hit = _read_cache.get(key)
+        if hit and hit[0] > time.monotonic():
+            value = hit[1]
+        else:
+            value = await loader()
+            _cache_put(key, value)
+    _read_locks.pop(key, None)
+    return dict(value) if value else None
+
+
+def invalidate_user_cache(user_id: int = None, email: str = None):
+    """Drop cached user/subscription rows for a user (by id and/or email)."""
+    dirty = _tx_dirty_users.get()
+    if dirty is not None:
+        dirty.add((user_id, email))
+    if email:
+        _read_cache.pop(("email", email.lower().strip()), None)
+    if user_id is None:
+        return
+    _read_cache.pop(("user", user_id), None)
+    _read_cache.pop(("sub", user_id), None)
+    stale = [
+        k for k, (_, v) in _read_cache.items()
+        if k[0] in ("email", "uid") and v and v.get("id") == user_id
+    ]
+    for k in stale:
+        _read_cache.pop(k, None)
 
 
 # ── Users ────────────────────────────────────────────────────
 
+_USER_COLUMNS = (
+    "id, email, password_hash, is_admin, supabase_uid, trial_ends_at, "
+    "trial_used_at, is_premium, subscription_status"
+)
+
 async def create_user(
     email: str,
     password_hash: str,
@@ -798,54 +1503,64 @@ async def create_user(
     trial_ends_at: str = None,
     signup_ip: str = None,
 ) -> int:
-    pool = await _get_pool()
-    async with pool.acquire() as conn:
-        row = await conn.fetchrow(
-            """INSERT INTO users (email, password_hash, is_admin, trial_ends_at, signup_ip)
-               VALUES ($1, $2, $3, $4, $5) RETURNING id""",
-            email.lower().strip(), password_hash, is_admin,
-            _parse_ts(trial_ends_at), signup_ip or None,
-        )
-        return row["id"]
+    pool = _executor()
+    new_id = await pool.fetchval(
+        """INSERT INTO users (email, password_hash, is_admin, trial_ends_at, signup_ip)
+           VALUES ($1, $2, $3, $4, $5) RETURNING id""",
+        email.lower().strip(), password_hash, is_admin,
+        _parse_ts(trial_ends_at), signup_ip or None,
+    )
+    _record_signup(signup_ip)
+    invalidate_user_cache(new_id, email)
+    return new_id
+
+
+_USER_BY_ID_SQL = f"SELECT {_USER_COLUMNS} FROM users WHERE id = $1"
+_USER_BY_EMAIL_SQL = f"SELECT {_USER_COLUMNS} FROM users WHERE email = $1"
+_USER_BY_UID_SQL = f"SELECT {_USER_COLUMNS} FROM users WHERE supabase_uid = $1"
 
 
 async def get_user_by_id(user_id: int):
-    pool = await _get_pool()
-    async with pool.acquire() as conn:
-        row = await conn.fetchrow("SELECT * FROM users WHERE id = $1", user_id)
+    async def load():
+        pool = _executor()
+        row = await pool.fetchrow(_USER_BY_ID_SQL, user_id)
         return dict(row) if row else None
+    return await _cached_read(("user", user_id), load)
 
 
 async def get_user_by_email(email: str):
-    pool = await _get_pool()
-    async with pool.acquire() as conn:
-        row = await conn.fetchrow(
-            "SELECT * FROM users WHERE email = $1", email.lower().strip()
-        )
+    email = email.lower().strip()
+
+    async def load():
+        pool = _executor()
+        row = await pool.fetchrow(_USER_BY_EMAIL_SQL, email)
         return dict(row) if row else None
+    return await _cached_read(("email", email), load)
 
 
 async def get_users_count() -> int:
-    pool = await _get_pool()
-    async with pool.acquire() as conn:
-        return await conn.fetchval("SELECT COUNT(*) FROM users")
+    pool = _executor()
+    return await pool.fetchval("SELECT COUNT(*) FROM users")
 
 
 async def get_user_by_supabase_uid(uid: str):
     if not uid:
         return None
-    pool = await _get_pool()
-    async with pool.acquire() as conn:
-        row = await conn.fetchrow("SELECT * FROM users WHERE supabase_uid = $1", uid)
+
+    async def load():
+        pool = _executor()
+        row = await pool.fetchrow(_USER_BY_UID_SQL, uid)
         return dict(row) if row else None
+    return await _cached_read(("uid", uid), load)
 
 
 async def link_supabase_uid(user_id: int, uid: str):
-    pool = await _get_pool()
-    async with pool.acquire() as conn:
-        await conn.execute(
-            "UPDATE users SET supabase_uid = $1 WHERE id = $2", uid, user_id
-        )
+    pool = _executor()
+    await pool.execute(
+        "UPDATE users SET supabase_uid = $1 WHERE id = $2", uid, user_id
+    )
+    _read_cache.pop(("uid", uid), None)
+    invalidate_user_cache(user_id)
 
 
 async def create_user_from_supabase(
@@ -855,54 +1570,89 @@ async def create_user_from_supabase(
     trial_ends_at: str = None,
     signup_ip: str = None,
 ) -> int:
-    pool = await _get_pool()
-    async with pool.acquire() as conn:
-        row = await conn.fetchrow(
-            """INSERT INTO users (email, password_hash, is_admin, supabase_uid, trial_ends_at, signup_ip)
-               VALUES ($1, '', $2, $3, $4, $5) RETURNING id""",
-            email.lower().strip(), is_admin,
-            supabase_uid or None, _parse_ts(trial_ends_at), signup_ip or None,
-        )
-        return row["id"]
+    pool = _executor()
+    new_id = await pool.fetchval(
+        """INSERT INTO users (email, password_hash, is_admin, supabase_uid, trial_ends_at, signup_ip)
+           VALUES ($1, '', $2, $3, $4, $5) RETURNING id""",
+        email.lower().strip(), is_admin,
+        supabase_uid or None, _parse_ts(trial_ends_at), signup_ip or None,
+    )
+    _record_signup(signup_ip)
+    _read_cache.pop(("uid", supabase_uid), None)
+    invalidate_user_cache(new_id, email)
+    return new_id
+
+
+# Rolling per-IP signup timestamps (epoch seconds) for the last 24h.  The app
+# runs as a single process, so this is authoritative once warmed from the
+# users table by init_db().
+_SIGNUP_WINDOW = 86400
+_ip_signups: dict[str, deque[float]] = defaultdict(deque)
+
+
+async def _warm_ip_signups(conn):
+    rows = await conn.fetch(
+        """SELECT signup_ip, EXTRACT(EPOCH FROM created_at) AS ts FROM users
+           WHERE signup_ip IS NOT NULL AND signup_ip <> ''
+             AND created_at > NOW() - INTERVAL '1 day'
+           ORDER BY created_at"""
+    )
+    _ip_signups.clear()
+    for r in rows:
+        _ip_signups[r["signup_ip"]].append(float(r["ts"]))
+
+
+def _record_signup(ip: str | None):
+    if ip and ip.strip():
+        _ip_signups[ip.strip()].append(time.time())
 
 
 async def count_signups_from_ip_last_24h(ip: str) -> int:
     if not ip or not ip.strip():
         return 0
-    pool = await _get_pool()
-    async with pool.acquire() as conn:
-        return await conn.fetchval(
-            """SELECT COUNT(*) FROM users
-               WHERE signup_ip = $1 AND created_at > NOW() - INTERVAL '1 day'""",
-            ip.strip(),
-        )
+    ip = ip.strip()
+    stamps = _ip_signups.get(ip)
+    if not stamps:
+        return 0
+    cutoff = time.time() - _SIGNUP_WINDOW
+    while stamps and stamps[0] <= cutoff:
+        stamps.popleft()
+    if not stamps:
+        del _ip_signups[ip]
+        return 0
+    return len(stamps)
 
 
 async def set_trial_ends_at(user_id: int, trial_ends_at: str):
-    pool = await _get_pool()
-    async with pool.acquire() as conn:
-        await conn.execute(
-            "UPDATE users SET trial_ends_at = $1 WHERE id = $2",
-            _parse_ts(trial_ends_at), user_id,
-        )
+    pool = _executor()
+    await pool.execute(
+        "UPDATE users SET trial_ends_at = $1 WHERE id = $2",
+        _parse_ts(trial_ends_at), user_id,
+    )
+    invalidate_user_cache(user_id)
 
 
 async def mark_trial_used(user_id: int, at: str = None):
-    ts = _parse_ts(at) or datetime.utcnow()
-    pool = await _get_pool()
-    async with pool.acquire() as conn:
-        await conn.execute(
+    ts = _parse_ts(at)
+    pool = _executor()
+    if ts is None:
+        await pool.execute(
+            "UPDATE users SET trial_used_at = NOW() WHERE id = $1", user_id
+        )
+    else:
+        await pool.execute(
             "UPDATE users SET trial_used_at = $1 WHERE id = $2", ts, user_id
         )
+    invalidate_user_cache(user_id)
 
 
 async def set_trial_used_on_subscription(user_id: int):
-    pool = await _get_pool()
-    async with pool.acquire() as conn:
-        await conn.execute(
-            "UPDATE users SET trial_used_at = COALESCE(trial_used_at, $1) WHERE id = $2",
-            datetime.utcnow(), user_id,
-        )
+    pool = _executor()
+    await pool.execute(
+        "UPDATE users SET trial_used_at = COALESCE(trial_used_at, NOW()) WHERE id = $1",
+        user_id,
+    )
+    invalidate_user_cache(user_id)
 
 
 # ── Billing helpers ───────────────────────────────────────────
@@ -919,23 +1669,22 @@ async def update_user_billing(user_id: int, *,
     if not parts:
         return
     values.append(user_id)
-    pool = await _get_pool()
-    async with pool.acquire() as conn:
-        await conn.execute(
-            f"UPDATE users SET {', '.join(parts)} WHERE id = ${idx}",
-            *values,
-        )
+    pool = _executor()
+    await pool.execute(
+        f"UPDATE users SET {', '.join(parts)} WHERE id = ${idx}",
+        *values,
+    )
+    invalidate_user_cache(user_id)
 
 
 async def expire_user_trial(user_id: int):
     """Force-expire a user's trial (for admin debug testing)."""
-    pool = await _get_pool()
-    now = datetime.utcnow()
-    async with pool.acquire() as conn:
-        await conn.execute(
-            "UPDATE users SET trial_ends_at = $1, trial_used_at = $2 WHERE id = $3",
-            now, now, user_id,
-        )
+    pool = _executor()
+    await pool.execute(
+        "UPDATE users SET trial_ends_at = NOW(), trial_used_at = NOW() WHERE id = $1",
+        user_id,
+    )
+    invalidate_user_cache(user_id)
 
 
 # ── Subscriptions ─────────────────────────────────────────────
@@ -944,100 +1693,196 @@ async def upsert_subscription(user_id: int, purchase_token: str,
                               product_id: str, status: str,
                               current_period_end: str,
                               platform: str = "google_play"):
-    pool = await _get_pool()
-    now = datetime.utcnow()
-    period_end = _parse_ts(current_period_end)
-    async with pool.acquire() as conn:
-        row = await conn.fetchrow(
-            "SELECT id FROM subscriptions WHERE purchase_token = $1",
-            purchase_token,
-        )
-        if row:
-            await conn.execute(
-                """UPDATE subscriptions SET status = $1, current_period_end = $2,
-                   updated_at = $3, product_id = $4, platform = $5
-                   WHERE purchase_token = $6""",
-                status, period_end, now, product_id, platform,
-                purchase_token,
-            )
-        else:
-            await conn.execute(
-                """INSERT INTO subscriptions
-                   (user_id, purchase_token, product_id, status,
-                    current_period_end, platform, updated_at)
-                   VALUES ($1, $2, $3, $4, $5, $6, $7)""",
-                user_id, purchase_token, product_id, status,
-                period_end, platform, now,
-            )
+    pool = _executor()
+    await pool.execute(
+        """INSERT INTO subscriptions
+           (user_id, purchase_token, product_id, status,
+            current_period_end, platform, updated_at)
+           VALUES ($1, $2, $3, $4, $5, $6, NOW())
+           ON CONFLICT (purchase_token) DO UPDATE SET
+               status = EXCLUDED.status,
+               current_period_end = EXCLUDED.current_period_end,
+               updated_at = NOW(),
+               product_id = EXCLUDED.product_id,
+               platform = EXCLUDED.platform""",
+        user_id, purchase_token, product_id, status,
+        _parse_ts(current_period_end), platform,
+    )
+    invalidate_user_cache(user_id)
+
+
+_SUBSCRIPTION_COLUMNS = (
+    "id", "user_id", "product_id", "platform", "status",
+    "current_period_end", "updated_at",
+)
+
+_ACTIVE_SUBSCRIPTION_SQL = """SELECT id, user_id, product_id, platform, status,
+                  current_period_end, updated_at
+           FROM subscriptions
+           WHERE user_id = $1 AND status IN ('active', 'trialing')
+           AND (current_period_end IS NULL OR current_period_end > NOW())
+           ORDER BY updated_at DESC LIMIT 1"""
 
 
 async def get_active_subscription(user_id: int):
-    pool = await _get_pool()
-    async with pool.acquire() as conn:
-        row = await conn.fetchrow(
-            """SELECT * FROM subscriptions
-               WHERE user_id = $1 AND status IN ('active', 'trialing')
-               AND (current_period_end IS NULL OR current_period_end > NOW())
-               ORDER BY updated_at DESC LIMIT 1""",
-            user_id,
-        )
+    async def load():
+        pool = _executor()
+        row = await pool.fetchrow(_ACTIVE_SUBSCRIPTION_SQL, user_id)
         return dict(row) if row else None
+    return await _cached_read(("sub", user_id), load)
+
+
+_USER_FIELDS = tuple(c.strip() for c in _USER_COLUMNS.split(","))
+
+_USER_WITH_SUBSCRIPTION_SQL = f"""
+    SELECT {", ".join("u." + c for c in _USER_FIELDS)},
+           {", ".join(f"s.{c} AS sub_{c}" for c in _SUBSCRIPTION_COLUMNS)}
+    FROM users u
+    LEFT JOIN LATERAL (
+        SELECT {", ".join(_SUBSCRIPTION_COLUMNS)}
+        FROM subscriptions
+        WHERE user_id = u.id AND status IN ('active', 'trialing')
+        AND (current_period_end IS NULL OR current_period_end > NOW())
+        ORDER BY updated_at DESC LIMIT 1
+    ) s ON TRUE
+    WHERE u.id = $1"""
+
+
+async def get_user_with_subscription(user_id: int) -> tuple[dict | None, dict | None]:
+    """Return ``(user, active_subscription)`` in one round trip.
+
+    Same rows as get_user_by_id() + get_active_subscription(); a miss loads
+    both with one LEFT JOIN and fills both cache entries, so later
+    get_active_subscription() calls in the request are cache hits.
+    """
+    user_key, sub_key = ("user", user_id), ("sub", user_id)
+
+    def cached():
+        now = time.monotonic()
+        user_hit = _read_cache.get(user_key)
+        sub_hit = _read_cache.get(sub_key)
+        if user_hit and sub_hit and user_hit[0] > now and sub_hit[0] > now:
+            return (dict(user_hit[1]) if user_hit[1] else None,
+                    dict(sub_hit[1]) if sub_hit[1] else None)
+        return None
+
+    async def load():
+        row = await _executor().fetchrow(_USER_WITH_SUBSCRIPTION_SQL, user_id)
+        if row is None:
+            return None, None
+        user = {c: row[c] for c in _USER_FIELDS}
+        sub = None
+        if row["sub_id"] is not None:
+            sub = {c: row["sub_" + c] for c in _SUBSCRIPTION_COLUMNS}
+        return user, sub
+
+    if _current_conn.get() is not None:
+        # Inside transaction(): may see uncommitted rows, never cache them.
+        return await load()
+    hit = cached()
+    if hit:
+        return hit
+    # Same lock as get_user_by_id(), so concurrent misses load once.
+    lock = _read_locks.setdefault(user_key, asyncio.Lock())
+    async with lock:
+        hit = cached()
+        if hit is None:
+            user, sub = await load()
+            if user is not None:
+                _cache_put(user_key, user)
+                _cache_put(sub_key, sub)
+            hit = (dict(user) if user else None, dict(sub) if sub else None)
+    _read_locks.pop(user_key, None)
+    return hit
 
 
 # ── Suggested Questions CRUD ──────────────────────────────────
 
-async def get_active_suggested_questions():
-    pool = await _get_pool()
-    async with pool.acquire() as conn:
-        rows = await conn.fetch(
-            "SELECT id, category, question FROM suggested_questions WHERE is_active = TRUE ORDER BY category, sort_order"
-        )
-        return [dict(r) for r in rows]
+# The active list is read on every chat page load and only changes through
+# the admin helpers below, which bump _sq_version.  The TTL bounds staleness
+# if a write's transaction commits after a concurrent reload.
+_sq_version = 0
+_sq_cache: tuple[int, float, list[dict]] | None = None
 
 
-async def get_all_suggested_questions():
-    pool = await _get_pool()
-    async with pool.acquire() as conn:
-        rows = await conn.fetch(
-            "SELECT * FROM suggested_questions ORDER BY category, sort_order"
-        )
-        return [dict(r) for r in rows]
+def _invalidate_suggested_questions():
+    global _sq_version
+    _sq_version += 1
+
+
+async def get_active_suggested_questions() -> list[dict]:
+    global _sq_cache
+    in_tx = _current_conn.get() is not None
+    cached = _sq_cache
+    if (not in_tx and cached and cached[0] == _sq_version
+            and cached[1] > time.monotonic()):
+        return list(cached[2])
+    version = _sq_version
+    pool = _executor()
+    rows = [dict(r) for r in await pool.fetch(
+        "SELECT id, category, question FROM suggested_questions WHERE is_active = TRUE ORDER BY category, sort_order"
+    )]
+    if not in_tx:
+        _sq_cache = (version, time.monotonic() + _READ_CACHE_TTL, rows)
+    return list(rows)
+
+
+async def get_suggested_questions_bundle() -> dict[str, list]:
+    """Full and active question lists from a single read of the table.
+
+    The active subset also refreshes the public-list cache, so an admin
+    viewing the list costs the next chat page load no query.
+    """
+    global _sq_cache
+    in_tx = _current_conn.get() is not None
+    version = _sq_version
+    pool = _executor()
+    rows = await pool.fetch(
+        "SELECT * FROM suggested_questions ORDER BY category, sort_order"
+    )
+    # Same projection as get_active_suggested_questions, so the public
+    # endpoint returns one shape whichever path filled the cache.
+    active = [
+        {"id": r["id"], "category": r["category"], "question": r["question"]}
+        for r in rows if r["is_active"]
+    ]
+    if not in_tx:
+        _sq_cache = (version, time.monotonic() + _READ_CACHE_TTL, active)
+    return {"all": rows, "active": list(active)}
+
+
+async def get_all_suggested_questions() -> list[asyncpg.Record]:
+    return (await get_suggested_questions_bundle())["all"]
 
 
 async def create_suggested_question(category: str, question: str, sort_order: int = 0):
-    pool = await _get_pool()
-    async with pool.acquire() as conn:
-        row = await conn.fetchrow(
-            "INSERT INTO suggested_questions (category, question, sort_order) VALUES ($1, $2, $3) RETURNING id",
-            category, question, sort_order,
-        )
-        return row["id"]
+    pool = _executor()
+    new_id = await pool.fetchval(
+        "INSERT INTO suggested_questions (category, question, sort_order) VALUES ($1, $2, $3) RETURNING id",
+        category, question, sort_order,
+    )
+    _invalidate_suggested_questions()
+    return new_id
 
 
 async def update_suggested_question(qid: int, category: str = None, question: str = None,
                                      is_active: bool = None, sort_order: int = None):
-    parts, values = [], []
-    idx = 1
-    if category is not None:
-        parts.append(f"category = ${idx}"); values.append(category); idx += 1
-    if question is not None:
-        parts.append(f"question = ${idx}"); values.append(question); idx += 1
-    if is_active is not None:
-        parts.append(f"is_active = ${idx}"); values.append(is_active); idx += 1
-    if sort_order is not None:
-        parts.append(f"sort_order = ${idx}"); values.append(sort_order); idx += 1
-    if not parts:
+    if category is None and question is None and is_active is None and sort_order is None:
         return
-    values.append(qid)
-    pool = await _get_pool()
-    async with pool.acquire() as conn:
-        await conn.execute(
-            f"UPDATE suggested_questions SET {', '.join(parts)} WHERE id = ${idx}",
-            *values,
-        )
+    pool = _executor()
+    await pool.execute(
+        """UPDATE suggested_questions SET
+               category   = COALESCE($1, category),
+               question   = COALESCE($2, question),
+               is_active  = COALESCE($3, is_active),
+               sort_order = COALESCE($4, sort_order)
+           WHERE id = $5""",
+        category, question, is_active, sort_order, qid,
+    )
+    _invalidate_suggested_questions()
 
 
 async def delete_suggested_question(qid: int):
-    pool = await _get_pool()
-    async with pool.acquire() as conn:
-        await conn.execute("DELETE FROM suggested_questions WHERE id = $1", qid)
+    pool = _executor()
+    await pool.execute("DELETE FROM suggested_questions WHERE id = $1", qid)
+    _invalidate_suggested_questions()
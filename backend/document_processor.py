@@ -6,11 +6,24 @@ Pipeline: Upload → Parse text → Clean → Extract metadata → Chunk → Sto
 All extractors accept raw bytes (no local filesystem needed).
 """
 
+import asyncio
 import io
 import re
 import logging
+import multiprocessing
+import zipfile
+import xml.etree.ElementTree as ET
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from itertools import accumulate
 import fitz  # PyMuPDF
 from docx import Document as DocxDocument
+try:
+    from charset_normalizer import from_bytes as _detect_charset
+except ImportError:  # pragma: no cover — falls back to a cp1252 guess
+    _detect_charset = None
 from backend.config import settings
 
 logger = logging.getLogger("rag.processor")
@@ -18,35 +31,57 @@ logger = logging.getLogger("rag.processor")
 
 # ── Text Cleaning ─────────────────────────────────────────────
 
-def clean_text(text: str) -> str:
-    """Clean extracted text: fix encoding artifacts, normalize whitespace."""
-    text = text.replace("\x00", "")
-    text = text.replace("\xad", "-")
-    text = text.replace("\u2013", "-")
-    text = text.replace("\u2014", "-")
-    text = text.replace("\u2018", "'")
-    text = text.replace("\u2019", "'")
-    text = text.replace("\u201c", '"')
-    text = text.replace("\u201d", '"')
-    text = text.replace("\u00ab", '"')
-    text = text.replace("\u00bb", '"')
-
-    text = re.sub(r'[^\S\n]+', ' ', text)
-    text = re.sub(r'\n{3,}', '\n\n', text)
+# Encoding artifacts and typographic punctuation, replaced in one pass.
+_CLEAN_TABLE = str.maketrans({
+    "\x00": "",
+    "\xad": "-",
+    "\u2013": "-",
+    "\u2014": "-",
+    "\u2018": "'",
+    "\u2019": "'",
+    "\u201c": '"',
+    "\u201d": '"',
+    "\u00ab": '"',
+    "\u00bb": '"',
+})
+
+_INLINE_WS_RE = re.compile(r'[^\S\n]+')
+_MULTI_NL_RE = re.compile(r'\n{3,}')
+_PAGE_NUMBER_LINE_RE = re.compile(r'^\d{1,4}$', re.MULTILINE)
+
+
+def clean_text(text: str, *, light: bool = False) -> str:
+    """Clean extracted text: fix encoding artifacts, normalize whitespace.
+
+    ``light`` is for input whose lines are already stripped and carry no
+    page-number lines (DOCX paragraphs): only characters and whitespace
+    runs are normalized.
+    """
+    text = text.translate(_CLEAN_TABLE)
+
+    text = _INLINE_WS_RE.sub(' ', text)
+    text = _MULTI_NL_RE.sub('\n\n', text)
+    if light:
+        return text.strip()
 
     lines = [line.strip() for line in text.split('\n')]
     text = '\n'.join(lines)
 
-    text = re.sub(r'^\d{1,4}$', '', text, flags=re.MULTILINE)
-    text = re.sub(r'\n{3,}', '\n\n', text)
+    text = _PAGE_NUMBER_LINE_RE.sub('', text)
+    text = _MULTI_NL_RE.sub('\n\n', text)
 
     return text.strip()
 
 
 # ── Text Extraction (from bytes) ─────────────────────────────
 
+# Marks page boundaries while all pages are cleaned as one string.  It is
+# neither whitespace nor touched by _CLEAN_TABLE, so it survives cleaning.
+_PAGE_SEP = "\x02"
+
+
 def extract_text_from_pdf_bytes(data: bytes) -> list[dict]:
-    pages = []
+    raw_pages = []
     try:
         doc = fitz.open(stream=data, filetype="pdf")
     except Exception as e:
@@ -55,44 +90,126 @@ def extract_text_from_pdf_bytes(data: bytes) -> list[dict]:
     try:
         for page_num in range(len(doc)):
             page = doc[page_num]
-            text = page.get_text("text")
-            cleaned = clean_text(text)
-            if cleaned and len(cleaned) > 10:
-                pages.append({"text": cleaned, "page": page_num + 1})
+            raw_pages.append(page.get_text("text").replace(_PAGE_SEP, ""))
     except Exception as e:
         logger.error(f"PDF page extraction error at page {page_num}: {e}")
     finally:
         doc.close()
+
+    # One clean_text pass over the whole document instead of one per page.
+    cleaned_pages = clean_text(f"\n{_PAGE_SEP}\n".join(raw_pages)).split(_PAGE_SEP)
+    pages = []
+    for page_num, text in enumerate(cleaned_pages, start=1):
+        cleaned = text.strip()
+        if cleaned and len(cleaned) > 10:
+            pages.append({"text": cleaned, "page": page_num})
     logger.info(f"PDF extracted: {len(pages)} pages from bytes ({len(data)} bytes)")
     return pages
 
 
+_W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_W_BODY = _W_NS + "body"
+_W_P = _W_NS + "p"
+_W_T = _W_NS + "t"
+_W_TAB = _W_NS + "tab"
+_W_R = _W_NS + "r"
+_W_HYPERLINK = _W_NS + "hyperlink"
+_W_BR = _W_NS + "br"
+_W_CR = _W_NS + "cr"
+_W_TYPE = _W_NS + "type"
+
+
+def _docx_run_text(run: ET.Element, parts: list[str]):
+    """Append a w:r's text the way python-docx's Run.text renders it."""
+    for node in run:
+        if node.tag == _W_T:
+            parts.append(node.text or "")
+        elif node.tag == _W_TAB:
+            parts.append("\t")
+        elif node.tag == _W_CR or (
+                node.tag == _W_BR and node.get(_W_TYPE, "textWrapping") == "textWrapping"):
+            parts.append("\n")
+
+
+def _docx_body_paragraphs(data: bytes) -> list[str]:
+    """Stream top-level paragraph texts straight from word/document.xml.
+
+    Matches python-docx's ``Document.paragraphs`` (body paragraphs only,
+    text from runs directly under the paragraph or a hyperlink, tabs and
+    line breaks kept) without building its object tree, so text boxes
+    nested in runs are skipped as they are there.  Each body child is
+    dropped as soon as it has been read.
+    """
+    texts: list[str] = []
+    body = None
+    depth = 0
+    with zipfile.ZipFile(io.BytesIO(data)) as zf, zf.open("word/document.xml") as xml:
+        for event, elem in ET.iterparse(xml, events=("start", "end")):
+            if event == "start":
+                depth += 1
+                if elem.tag == _W_BODY:
+                    body = elem
+                continue
+            depth -= 1
+            if depth != 2 or body is None:
+                continue
+            if elem.tag == _W_P:
+                parts: list[str] = []
+                for child in elem:
+                    if child.tag == _W_R:
+                        _docx_run_text(child, parts)
+                    elif child.tag == _W_HYPERLINK:
+                        for run in child.iterfind(_W_R):
+                            _docx_run_text(run, parts)
+                texts.append("".join(parts))
+            body.remove(elem)
+    return texts
+
+
 def extract_text_from_docx_bytes(data: bytes) -> list[dict]:
     try:
-        doc = DocxDocument(io.BytesIO(data))
+        paragraphs = _docx_body_paragraphs(data)
     except Exception as e:
-        logger.error(f"DOCX open failed ({len(data)} bytes): {e}")
-        return []
+        logger.warning(f"DOCX XML stream failed, falling back to python-docx: {e}")
+        try:
+            doc = DocxDocument(io.BytesIO(data))
+        except Exception as e:
+            logger.error(f"DOCX open failed ({len(data)} bytes): {e}")
+            return []
+        paragraphs = [para.text for para in doc.paragraphs]
     full_text = []
-    for para in doc.paragraphs:
-        cleaned = para.text.strip()
+    for para in paragraphs:
+        cleaned = para.strip()
         if cleaned:
             full_text.append(cleaned)
-    text = clean_text("\n".join(full_text))
+    text = clean_text("\n".join(full_text), light=True)
     logger.info(f"DOCX extracted: {len(text)} chars from bytes")
     return [{"text": text, "page": 1}]
 
 
+def _decode_txt(data: bytes) -> tuple[str, str]:
+    """Decode a text upload, returning (text, encoding name).
+
+    UTF-8 (with or without BOM) is tried first since it fails fast on
+    anything else; otherwise the encoding is detected in one pass. latin-1
+    is never tried blindly — it accepts every byte and mangles cp1252.
+    """
+    try:
+        return data.decode("utf-8-sig"), "utf-8"
+    except UnicodeDecodeError:
+        pass
+    if _detect_charset is not None:
+        best = _detect_charset(data).best()
+        if best is not None:
+            return str(best), best.encoding
+    return data.decode("cp1252", errors="replace"), "cp1252"
+
+
 def extract_text_from_txt_bytes(data: bytes) -> list[dict]:
-    encodings = ["utf-8", "latin-1", "cp1252"]
-    for enc in encodings:
-        try:
-            text = clean_text(data.decode(enc))
-            logger.info(f"TXT extracted: {len(text)} chars ({enc}) from bytes")
-            return [{"text": text, "page": 1}]
-        except UnicodeDecodeError:
-            continue
-    raise ValueError("Could not decode text file with supported encodings.")
+    raw, enc = _decode_txt(data)
+    text = clean_text(raw)
+    logger.info(f"TXT extracted: {len(text)} chars ({enc}) from bytes")
+    return [{"text": text, "page": 1}]
 
 
 def extract_text(file_data: bytes, file_type: str) -> list[dict]:
@@ -111,49 +228,83 @@ def extract_text(file_data: bytes, file_type: str) -> list[dict]:
 
 # ── Metadata Extraction ──────────────────────────────────────
 
-def extract_metadata(full_text: str) -> dict:
-    """Extract Albanian law metadata from document text."""
+class _PriorityPatterns:
+    """Ordered regex alternatives scanned in one pass.
+
+    The result is what trying each pattern in turn would give: the earliest
+    match of the first pattern that matches anywhere, not simply the
+    leftmost match of any of them.
+    """
+
+    def __init__(self, *patterns: str):
+        parts, self._slots, group = [], {}, 0
+        for rank, pattern in enumerate(patterns):
+            inner = re.compile(pattern).groups
+            # Lookahead so a long match of one pattern cannot consume text
+            # where a higher-ranked one starts.  The wrapping group closes
+            # last, so it is the match's lastindex.
+            parts.append(f"(?=({pattern}))")
+            self._slots[group + 1] = (rank, group + 2 if inner else group + 1)
+            group += 1 + inner
+        self._regex = re.compile("|".join(parts))
+
+    def search_ranked(self, text: str) -> tuple[int, str | None]:
+        """Return (index of the winning pattern, its value); (-1, None) if none match."""
+        best_rank, value = len(self._slots), None
+        for match in self._regex.finditer(text):
+            rank, group = self._slots[match.lastindex]
+            if rank < best_rank:
+                best_rank, value = rank, match.group(group)
+                if rank == 0:
+                    break
+        return (best_rank, value) if value is not None else (-1, None)
+
+    def search(self, text: str) -> str | None:
+        return self.search_ranked(text)[1]
+
+
+_LAW_NUMBER_PATTERNS = _PriorityPatterns(
+    r'LIGJ\s*[Nn][Rr]\.?\s*([\d/]+)',
+    r'[Ll][Ii][Gg][Jj]\s*[Nn][Rr]\.?\s*([\d/]+)',
+    r'[Ll]igji?\s+[Nn]r\.?\s*([\d/]+)',
+    r'VENDIM\s*[Nn][Rr]\.?\s*([\d/]+)',
+    r'KODI\s+\w+',
+)
+
+_LAW_DATE_PATTERNS = _PriorityPatterns(
+    r'[Dd]at[ëe]\s+([\d]{1,2}[./][\d]{1,2}[./][\d]{4})',
+    r'[Dd]at[ëe]s?\s+([\d]{1,2}\s+\w+\s+[\d]{4})',
+    r'(\d{1,2}[./]\d{1,2}[./]\d{4})',
+)
+
+_NUMERIC_LINE_RE = re.compile(r'^[\d\s./]+$')
+
+
+_METADATA_HEADER_CHARS = 3000
+
+
+def extract_header_metadata(header: str) -> dict:
+    """Law number, date and title — everything read from the document head."""
     metadata = {}
-    header = full_text[:3000]
-
-    law_patterns = [
-        r'LIGJ\s*[Nn][Rr]\.?\s*([\d/]+)',
-        r'[Ll][Ii][Gg][Jj]\s*[Nn][Rr]\.?\s*([\d/]+)',
-        r'[Ll]igji?\s+[Nn]r\.?\s*([\d/]+)',
-        r'VENDIM\s*[Nn][Rr]\.?\s*([\d/]+)',
-        r'KODI\s+\w+',
-    ]
-    for pattern in law_patterns:
-        match = re.search(pattern, header)
-        if match:
-            metadata["law_number"] = (
-                match.group(1).strip() if match.lastindex else match.group(0).strip()
-            )
-            break
 
-    date_patterns = [
-        r'[Dd]at[ëe]\s+([\d]{1,2}[./][\d]{1,2}[./][\d]{4})',
-        r'[Dd]at[ëe]s?\s+([\d]{1,2}\s+\w+\s+[\d]{4})',
-        r'(\d{1,2}[./]\d{1,2}[./]\d{4})',
-    ]
-    for pattern in date_patterns:
-        match = re.search(pattern, header)
-        if match:
-            metadata["law_date"] = match.group(1).strip()
-            break
+    # One scan per family instead of one search per pattern.
+    law_number = _LAW_NUMBER_PATTERNS.search(header)
+    if law_number:
+        metadata["law_number"] = law_number.strip()
+
+    law_date = _LAW_DATE_PATTERNS.search(header)
+    if law_date:
+        metadata["law_date"] = law_date.strip()
 
-    lines = header.strip().split('\n')
+    lines = header.lstrip().split('\n', 15)
     for line in lines[:15]:
         cleaned = line.strip()
-        if len(cleaned) > 10 and not re.match(r'^[\d\s./]+$', cleaned):
+        # A letter rules out a numbers-only line; the regex settles the rest.
+        if len(cleaned) > 10 and (any(c.isalpha() for c in cleaned)
+                                  or not _NUMERIC_LINE_RE.match(cleaned)):
             metadata["title"] = cleaned[:200]
             break
 
-    articles = re.findall(r'[Nn]eni\s+(\d+)', full_text)
-    if articles:
-        metadata["article_count"] = len(set(articles))
-
-    logger.info(f"Metadata extracted: {metadata}")
     return metadata
 
 
@@ -180,75 +331,84 @@ ALBANIAN_LEGAL_SEPARATORS = [
 _MIN_CHUNK_LEN = 30
 
 
-def _build_page_index(pages: list[dict]) -> tuple[str, list[tuple[int, int, int]]]:
-    """Combine page texts and build a sorted offset-to-page lookup."""
-    parts: list[str] = []
-    spans: list[tuple[int, int, int]] = []
-    offset = 0
-    for p in pages:
-        text = p["text"]
-        spans.append((offset, offset + len(text), p["page"]))
-        parts.append(text)
-        offset += len(text) + 2
-    combined = "\n\n".join(parts)
-    return combined, spans
-
-
-def _pages_for_span(start: int, end: int,
-                    spans: list[tuple[int, int, int]]) -> list[int]:
-    """Return sorted page numbers that overlap [start, end)."""
-    result: set[int] = set()
-    for sp_start, sp_end, page in spans:
-        if sp_start >= end:
-            break
-        if sp_end > start:
-            result.add(page)
-    return sorted(result) if result else [1]
+@lru_cache(maxsize=8)
+def _get_splitter(chunk_size: int, chunk_overlap: int) -> RecursiveCharacterTextSplitter:
+    """Splitter for a (size, overlap) pair, built once and reused."""
+    return RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        separators=ALBANIAN_LEGAL_SEPARATORS,
+        keep_separator=True,
+        length_function=len,
+        is_separator_regex=False,
+    )
+
+
+_PageSpans = tuple[list[int], list[int], list[int]]  # (starts, ends, page numbers)
+
+
+def _build_page_index(pages: list[dict]) -> tuple[str, _PageSpans]:
+    """Combine page texts and build sorted offset arrays for page lookup."""
+    texts = [p["text"] for p in pages]
+    # Each page starts after the previous one plus its "\n\n" separator.
+    starts = list(accumulate((len(t) + 2 for t in texts), initial=0))[:-1]
+    ends = [start + len(t) for start, t in zip(starts, texts)]
+    page_nums = [p["page"] for p in pages]
+    return "\n\n".join(texts), (starts, ends, page_nums)
+
 
+def _pages_for_span(start: int, end: int, spans: _PageSpans) -> list[int]:
+    """Return sorted page numbers that overlap [start, end).
 
-def _detect_section_title(text: str) -> str:
-    """Extract a section title from chunk text (Neni X, Kreu X, etc.)."""
-    patterns = [
-        (r'[Nn]eni\s+(\d+[\w]*)', 'Neni'),
-        (r'[Kk][Rr][Ee][Uu]\s+([IVXLCDM]+|\d+)', 'Kreu'),
-        (r'[Pp]ika\s+(\d+)', 'Pika'),
-        (r'[Ss]eksioni\s+([IVXLCDM]+|\d+)', 'Seksioni'),
-    ]
-    for pattern, prefix in patterns:
-        match = re.search(pattern, text[:200])
-        if match:
-            return f"{prefix} {match.group(1)}"
-    return ""
+    Spans are disjoint and ordered, so two binary searches bound the
+    overlapping run: O(log P) per chunk instead of a scan over pages.
+    """
+    starts, ends, page_nums = spans
+    first = bisect_right(ends, start)   # first span ending after start
+    last = bisect_left(starts, end)     # spans starting before end
+    result = sorted(set(page_nums[first:last]))
+    return result if result else [1]
+
+
+_SECTION_TITLE_PREFIXES = ('Neni', 'Kreu', 'Pika', 'Seksioni')
+_SECTION_TITLE_PATTERNS = _PriorityPatterns(
+    r'[Nn]eni\s+(\d+[\w]*)',
+    r'[Kk][Rr][Ee][Uu]\s+([IVXLCDM]+|\d+)',
+    r'[Pp]ika\s+(\d+)',
+    r'[Ss]eksioni\s+([IVXLCDM]+|\d+)',
+)
+_LEADING_DIGITS_RE = re.compile(r'\d+')
 
 
-def _detect_article_number(text: str) -> str | None:
-    """Extract article number (Neni X) from chunk text."""
-    match = re.search(r'[Nn]eni\s+(\d+)', text[:200])
-    return match.group(1) if match else None
+def _detect_headings(text: str) -> tuple[str | None, str]:
+    """Extract (article number, section title) from the head of a chunk.
+
+    One scan of the first 200 chars serves both: the article is the
+    number of the first 'Neni N', which is also the section title when
+    present; otherwise the title falls back to Kreu, Pika or Seksioni.
+    """
+    rank, value = _SECTION_TITLE_PATTERNS.search_ranked(text[:200])
+    if rank < 0:
+        return None, ""
+    article = _LEADING_DIGITS_RE.match(value).group() if rank == 0 else None
+    return article, f"{_SECTION_TITLE_PREFIXES[rank]} {value}"
 
 
 def chunk_text_by_articles(pages: list[dict], chunk_size: int = None,
-                           chunk_overlap: int = None) -> list[dict]:
+                           chunk_overlap: int = None,
+                           page_index: tuple[str, _PageSpans] = None) -> list[dict]:
     """Split document into chunks using LangChain RecursiveCharacterTextSplitter.
 
     Separators are tuned for Albanian legal documents: article, chapter,
-    point, paragraph, sentence, and word boundaries.
+    point, paragraph, sentence, and word boundaries.  Pass ``page_index``
+    (from _build_page_index) to reuse an already-joined document text.
     """
     chunk_size = chunk_size or settings.CHUNK_SIZE
     chunk_overlap = chunk_overlap or settings.CHUNK_OVERLAP
 
-    combined_text, page_spans = _build_page_index(pages)
-
-    splitter = RecursiveCharacterTextSplitter(
-        chunk_size=chunk_size,
-        chunk_overlap=chunk_overlap,
-        separators=ALBANIAN_LEGAL_SEPARATORS,
-        keep_separator=True,
-        length_function=len,
-        is_separator_regex=False,
-    )
+    combined_text, page_spans = page_index or _build_page_index(pages)
 
-    raw_chunks = splitter.split_text(combined_text)
+    raw_chunks = _get_splitter(chunk_size, chunk_overlap).split_text(combined_text)
 
     chunks: list[dict] = []
     search_start = 0
@@ -257,13 +417,25 @@ def chunk_text_by_articles(pages: list[dict], chunk_size: int = None,
         if len(chunk_text.strip()) < _MIN_CHUNK_LEN:
             continue
 
-        pos = combined_text.find(chunk_text[:80], max(search_start - 50, 0))
+        # Chunks come back in document order, so the head can only sit a
+        # short way past the previous chunk; bounding the window keeps a
+        # miss from rescanning the rest of the document.
+        lo = max(search_start - 50, 0)
+        head = chunk_text[:80]
+        pos = combined_text.find(head, lo, lo + len(chunk_text) + chunk_size + 80)
+        if pos == -1:
+            # Rare: fall back to one unbounded search rather than guessing,
+            # which would skew the pages of this and every later chunk.
+            pos = combined_text.find(head, lo)
         if pos == -1:
+            logger.warning(
+                f"Chunk {idx} not found in document text; "
+                f"page numbers for it are estimated from offset {search_start}"
+            )
             pos = search_start
 
         pg = _pages_for_span(pos, pos + len(chunk_text), page_spans)
-        article = _detect_article_number(chunk_text)
-        section = _detect_section_title(chunk_text)
+        article, section = _detect_headings(chunk_text)
 
         chunks.append({
             "text": chunk_text.strip(),
@@ -301,6 +473,84 @@ def chunk_text_by_articles(pages: list[dict], chunk_size: int = None,
 
 # ── Full Processing Pipeline ─────────────────────────────────
 
+_FILE_EXTENSION_RE = re.compile(r'\.[^.]+$')
+
+_process_pool: ProcessPoolExecutor | None = None
+
+
+def _init_worker():
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(name)s] %(levelname)s: %(message)s",
+    )
+
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    """Lazily start the worker processes used for parsing and chunking.
+
+    Workers are spawned rather than forked: the API process runs threads
+    (asyncio.to_thread, the DB pool) that must not be duplicated mid-lock.
+    """
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(
+            max_workers=max(1, settings.PROCESSING_WORKERS),
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+        )
+    return _process_pool
+
+
+def shutdown_process_pool():
+    """Stop the worker processes (called on application shutdown)."""
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = None
+
+
+async def _run_parse_document(file_data: bytes, file_type: str):
+    """Run _parse_document in the pool, rebuilding it once if it broke.
+
+    A worker killed mid-task (OOM, a PyMuPDF crash on a malformed PDF)
+    leaves the executor permanently broken; without a rebuild every later
+    upload would fail until the app restarts.
+    """
+    global _process_pool
+    loop = asyncio.get_running_loop()
+    for attempt in range(2):
+        pool = _get_process_pool()
+        try:
+            return await loop.run_in_executor(pool, _parse_document, file_data, file_type)
+        except BrokenProcessPool:
+            logger.warning("Document worker pool broke; starting a fresh one")
+            pool.shutdown(wait=False, cancel_futures=True)
+            if _process_pool is pool:
+                _process_pool = None
+            if attempt:
+                raise
+
+
+def _parse_document(file_data: bytes, file_type: str) -> tuple[list[dict], dict, list[dict]]:
+    """Extract, clean, read metadata and chunk — the CPU-bound part of the pipeline.
+
+    Runs inside a worker process; everything returned is plain data.
+    """
+    pages = extract_text(file_data, file_type)
+    if not pages:
+        return [], {}, []
+    # One joined copy of the document serves both metadata and chunking.
+    page_index = _build_page_index(pages)
+    metadata = extract_header_metadata(page_index[0][:_METADATA_HEADER_CHARS])
+    chunks = chunk_text_by_articles(pages, page_index=page_index)
+    # The chunks already carry their article numbers; no second full scan.
+    articles = {c["article"] for c in chunks if c["article"]}
+    if articles:
+        metadata["article_count"] = len(articles)
+    logger.info(f"Metadata extracted: {metadata}")
+    return pages, metadata, chunks
+
+
 async def process_document(doc_id: int, user_id: int,
                            file_data: bytes, file_type: str):
     """Full pipeline: extract → clean → metadata → chunk → embed.
@@ -314,7 +564,7 @@ async def process_document(doc_id: int, user_id: int,
     from backend.database import (
         update_document_status, update_document_page_count,
         insert_chunks, delete_chunks_for_document,
-        get_document,
+        get_document, transaction,
     )
     from backend.vector_store import add_chunks_to_store
 
@@ -322,7 +572,9 @@ async def process_document(doc_id: int, user_id: int,
         await update_document_status(doc_id, "processing")
         logger.info(f"[doc:{doc_id}] Starting processing ({file_type}, {len(file_data)} bytes)")
 
-        pages = extract_text(file_data, file_type)
+        # Parsing and chunking are regex-heavy pure Python; a worker
+        # process keeps them from holding the GIL the event loop needs.
+        pages, metadata, chunks = await _run_parse_document(file_data, file_type)
         if not pages:
             raise ValueError("No text could be extracted from the document.")
         total_chars = sum(len(p["text"]) for p in pages)
@@ -331,9 +583,6 @@ async def process_document(doc_id: int, user_id: int,
 
         await update_document_page_count(doc_id, page_count)
 
-        full_text = "\n\n".join(p["text"] for p in pages)
-        metadata = extract_metadata(full_text)
-
         db_doc = await get_document(doc_id)
         if db_doc:
             db_title = db_doc.get("title") or ""
@@ -341,9 +590,8 @@ async def process_document(doc_id: int, user_id: int,
             if db_title and len(db_title) > 3:
                 metadata["title"] = db_title
             elif db_orig:
-                metadata["title"] = re.sub(r'\.[^.]+$', '', db_orig)
+                metadata["title"] = _FILE_EXTENSION_RE.sub('', db_orig)
 
-        chunks = chunk_text_by_articles(pages)
         if not chunks:
             raise ValueError("Document produced no usable text chunks.")
         logger.info(f"[doc:{doc_id}] Created {len(chunks)} chunks")
@@ -351,16 +599,18 @@ async def process_document(doc_id: int, user_id: int,
         await add_chunks_to_store(doc_id, user_id, chunks, metadata)
         logger.info(f"[doc:{doc_id}] Stored {len(chunks)} embeddings (user_id={user_id})")
 
-        await delete_chunks_for_document(doc_id)
-        await insert_chunks(doc_id, user_id, chunks)
+        # Swap the chunk rows and flip the status in one commit, so search
+        # never sees the document half-replaced.
+        async with transaction():
+            await delete_chunks_for_document(doc_id)
+            await insert_chunks(doc_id, user_id, chunks)
+            await update_document_status(
+                doc_id, "ready",
+                total_chunks=len(chunks),
+                metadata=metadata
+            )
         logger.info(f"[doc:{doc_id}] Stored {len(chunks)} chunks in FTS index")
 
-        await update_document_status(
-            doc_id, "ready",
-            total_chunks=len(chunks),
-            metadata=metadata
-        )
-
         logger.info(f"[doc:{doc_id}] Processing complete: {len(chunks)} chunks, {page_count} pages")
         return chunks, metadata
 
@@ -53,7 +53,7 @@ async def hybrid_search(query: str, user_id: int = None,
         }
     """
     from backend.vector_store import search_documents
-    from backend.database import keyword_search_chunks
+    from backend.database import keyword_search_chunks, get_chunks_by_ids
 
     final_k = final_k or settings.HYBRID_FINAL_K
     fetch_k = settings.HYBRID_FETCH_K
@@ -83,6 +83,7 @@ async def hybrid_search(query: str, user_id: int = None,
         user_id=user_id,
         document_id=doc_id,
         limit=fetch_k,
+        include_content=False,
     )
     keyword_time = int((time.time() - keyword_start) * 1000)
 
@@ -111,7 +112,6 @@ async def hybrid_search(query: str, user_id: int = None,
         })
 
     for rank, kw_chunk in enumerate(keyword_results):
-        text = kw_chunk.get("content", "")
         key = _chunk_key_kw(kw_chunk)
         if key not in candidates:
             candidates[key] = _make_candidate_kw(kw_chunk, keyword_rank=rank + 1)
@@ -121,10 +121,21 @@ async def hybrid_search(query: str, user_id: int = None,
             if "keyword" not in cand["sources"]:
                 cand["sources"].append("keyword")
 
+    # Keyword-only candidates arrive without text — vector hits already carry
+    # it, so only the remainder is fetched, in a single round trip.
+    missing = [c for c in candidates.values() if not c["text"] and c.get("chunk_id")]
+    if missing:
+        contents = await get_chunks_by_ids([c["chunk_id"] for c in missing], user_id)
+        for cand in missing:
+            cand["text"] = contents.get(cand["chunk_id"], "")
+            cand["char_count"] = cand["char_count"] or len(cand["text"])
+
+    for rank, kw_chunk in enumerate(keyword_results):
+        cand = candidates[_chunk_key_kw(kw_chunk)]
         debug_keyword.append({
             "rank": rank + 1,
             "fts_rank": kw_chunk.get("fts_rank", 0),
-            "text_preview": text[:80],
+            "text_preview": cand["text"][:80],
         })
 
     # ── 4. Compute base RRF scores ────────────────────────
@@ -307,6 +318,7 @@ def _make_candidate_kw(kw_chunk: dict, keyword_rank: int) -> dict:
     text = kw_chunk.get("content", "")
     return {
         "text": text,
+        "chunk_id": kw_chunk.get("id"),
         "doc_id": str(kw_chunk.get("document_id", "")),
         "user_id": str(kw_chunk.get("user_id", "")),
         "article": kw_chunk.get("article", ""),
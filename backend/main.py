@@ -7,7 +7,6 @@ Multi-user document QA with per-user isolation.
 import os
 import uuid
 import asyncio
-import json
 import logging
 from datetime import datetime, timedelta
 from pathlib import Path
@@ -34,6 +33,7 @@ from backend.config import settings
 from backend.database import (
     init_db, create_document, get_all_documents, get_document,
     get_user_documents, get_user_ready_documents, get_all_ready_documents,
+    has_ready_documents, get_document_counts,
     get_document_for_user,
     delete_document, update_document_status, save_chat_message,
     get_chat_history, create_user, get_user_by_email, get_user_by_id, get_users_count,
@@ -49,12 +49,12 @@ from backend.auth import (
     hash_password, verify_password, create_access_token,
     get_current_user, get_current_user_optional, require_admin, require_subscription,
 )
-from backend.database import get_active_subscription, upsert_subscription
+from backend.database import get_active_subscription, upsert_subscription, transaction
 from backend.database import (
     get_active_suggested_questions, get_all_suggested_questions,
     create_suggested_question, update_suggested_question, delete_suggested_question,
 )
-from backend.database import _get_pool
+from backend.database import _get_pool, _pool_sync, invalidate_user_cache
 from backend.file_storage import (
     upload_file as storage_upload, download_file as storage_download,
     delete_file as storage_delete, storage_path_for_doc,
@@ -112,6 +112,8 @@ async def lifespan(app: FastAPI):
     logger.info("Application startup complete")
     yield
     from backend.database import close_pool
+    from backend.document_processor import shutdown_process_pool
+    shutdown_process_pool()
     await close_pool()
 
 
@@ -154,7 +156,7 @@ async def _rebuild_chroma_if_empty() -> bool:
 
     logger.info(f"ChromaDB is empty but {len(ready_docs)} ready docs exist — rebuilding...")
 
-    pool = await _get_pool()
+    pool = _pool_sync()
     total_rebuilt = 0
 
     for doc in ready_docs:
@@ -673,15 +675,16 @@ async def verify_google_play_purchase(
         now = datetime.utcnow()
         period_end_str = (now + timedelta(days=31)).strftime("%Y-%m-%dT%H:%M:%S")
 
-    await upsert_subscription(
-        user_id=user["id"],
-        purchase_token=req.purchase_token,
-        product_id=req.product_id,
-        status="active",
-        current_period_end=period_end_str,
-        platform="google_play",
-    )
-    await set_trial_used_on_subscription(user["id"])
+    async with transaction():
+        await upsert_subscription(
+            user_id=user["id"],
+            purchase_token=req.purchase_token,
+            product_id=req.product_id,
+            status="active",
+            current_period_end=period_end_str,
+            platform="google_play",
+        )
+        await set_trial_used_on_subscription(user["id"])
     logger.info(f"Google Play subscription activated for user {user['id']}")
     return {"status": "active", "current_period_end": period_end_str}
 
@@ -1158,8 +1161,7 @@ async def _validate_chat_prereqs(user_id: int, document_id: int = None,
     Admin: checks own documents. Normal user: checks all ready docs globally.
     """
     if is_admin:
-        ready_docs = await get_user_ready_documents(user_id)
-        if not ready_docs:
+        if not await has_ready_documents(user_id):
             all_user_docs = await get_user_documents(user_id)
             processing = [d for d in all_user_docs if d.get("status") == "processing"]
             if processing:
@@ -1180,8 +1182,7 @@ async def _validate_chat_prereqs(user_id: int, document_id: int = None,
                 )
     else:
         # Normal users search globally — check if ANY ready documents exist
-        ready_docs = await get_all_ready_documents()
-        if not ready_docs:
+        if not await has_ready_documents():
             return "Sistemi nuk ka dokumente të gatshme aktualisht. Ju lutem provoni më vonë."
 
     return None
@@ -1230,7 +1231,7 @@ async def chat(request: Request, body: ChatRequest, user: dict = Depends(require
 
     session_id = body.session_id or uuid.uuid4().hex
 
-    history = await get_chat_history(session_id)
+    history = await get_chat_history(session_id, include_sources=False)
     history_for_llm = [
         {"role": m["role"], "content": m["content"]} for m in history
     ]
@@ -1278,14 +1279,10 @@ async def chat(request: Request, body: ChatRequest, user: dict = Depends(require
 
 @app.get("/api/chat/history/{session_id}")
 async def get_chat_history_endpoint(
-    session_id: str, user: dict = Depends(require_subscription)
+    session_id: str, after_id: Optional[int] = None,
+    user: dict = Depends(require_subscription),
 ):
-    messages = await get_chat_history(session_id)
-    for msg in messages:
-        if isinstance(msg.get("sources_json"), str):
-            msg["sources"] = json.loads(msg["sources_json"])
-        else:
-            msg["sources"] = msg.get("sources_json", [])
+    messages = await get_chat_history(session_id, after_id=after_id)
     return {"messages": messages}
 
 
@@ -1680,10 +1677,12 @@ async def promote_to_admin(request: Request, admin: dict = Depends(require_admin
     email = body.get("email", "").strip().lower()
     if not email:
         raise HTTPException(status_code=400, detail="Email required")
-    pool = await _get_pool()
+    pool = _pool_sync()
     async with pool.acquire() as conn:
         await conn.execute("UPDATE users SET is_admin = TRUE WHERE email = $1", email)
         row = await conn.fetchrow("SELECT id, email, is_admin FROM users WHERE email = $1", email)
+    if row:
+        invalidate_user_cache(row["id"], email)
     if not row:
         raise HTTPException(status_code=404, detail="User not found")
     return {"ok": True, "user": {"id": row["id"], "email": row["email"], "is_admin": bool(row["is_admin"])}}
@@ -1714,15 +1713,14 @@ async def health_check_detailed():
     except Exception as e:
         db_status = f"error: {e}"
     storage = await check_storage_health()
-    docs = await get_all_documents()
-    ready = [d for d in docs if d.get("status") == "ready"]
+    counts = await get_document_counts()
     stats = get_store_stats()
     return {
         "status": "healthy",
         "db": db_status,
         "storage": storage,
-        "documents_total": len(docs),
-        "documents_ready": len(ready),
+        "documents_total": counts["total"],
+        "documents_ready": counts["ready"],
         "vector_store": stats,
     }
 
@@ -1770,7 +1768,7 @@ async def debug_store_stats(user: dict = Depends(require_admin)):
 async def debug_db_chunks(user: dict = Depends(require_admin)):
     """Check how many chunks exist in PostgreSQL and test FTS."""
     from backend.database import keyword_search_chunks, _build_pg_tsquery
-    pool = await _get_pool()
+    pool = _pool_sync()
     async with pool.acquire() as conn:
         total = await conn.fetchval("SELECT COUNT(*) FROM document_chunks")
         user_chunks = await conn.fetchval(
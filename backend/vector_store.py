@@ -10,6 +10,7 @@ Features:
 - Migration helper for existing chunks without user_id
 """
 
+import asyncio
 import hashlib
 import logging
 import time
@@ -109,38 +110,58 @@ def get_embedding(text: str) -> list[float]:
     return embedding
 
 
-def get_embeddings_batch(texts: list[str]) -> list[list[float]]:
-    """Generate embeddings for a batch of texts with null-guard."""
-    _ensure_initialized()
-    all_embeddings = []
-    batch_size = 50
-    total = len(texts)
-    null_count = 0
+_EMBED_BATCH_SIZE = 50
+_EMBED_CONCURRENCY = 4  # embedding requests in flight per document
 
-    for i in range(0, total, batch_size):
-        batch = texts[i:i + batch_size]
-        cleaned_batch = [t.strip() if t.strip() else "[empty]" for t in batch]
 
-        response = openai_client.embeddings.create(
-            model=settings.EMBEDDING_MODEL,
-            input=cleaned_batch,
-            timeout=30.0,
-        )
+def _embed_batch(batch: list[str], offset: int) -> list[list[float]]:
+    """One embeddings API call; logs null vectors by absolute index."""
+    cleaned_batch = [t.strip() if t.strip() else "[empty]" for t in batch]
+
+    response = openai_client.embeddings.create(
+        model=settings.EMBEDDING_MODEL,
+        input=cleaned_batch,
+        timeout=30.0,
+    )
 
-        for j, data in enumerate(response.data):
-            emb = data.embedding
-            if not emb or all(v == 0.0 for v in emb[:10]):
-                null_count += 1
-                logger.warning(f"Null embedding at index {i+j}: {cleaned_batch[j][:60]}...")
-            all_embeddings.append(emb)
+    embeddings = []
+    for j, data in enumerate(response.data):
+        emb = data.embedding
+        if not emb or all(v == 0.0 for v in emb[:10]):
+            logger.warning(f"Null embedding at index {offset+j}: {cleaned_batch[j][:60]}...")
+        embeddings.append(emb)
+    return embeddings
 
-        logger.info(f"Embeddings batch {i//batch_size + 1}: {min(i+batch_size, total)}/{total} done")
 
+def _log_null_embeddings(embeddings: list[list[float]]):
+    total = len(embeddings)
+    null_count = sum(1 for emb in embeddings if not emb or all(v == 0.0 for v in emb[:10]))
     if null_count > 0:
         logger.warning(f"WARNING: {null_count} null embeddings detected out of {total}")
     else:
         logger.info(f"All {total} embeddings generated successfully (no nulls)")
 
+
+async def get_embeddings_batch_async(texts: list[str]) -> list[list[float]]:
+    """Generate embeddings for a batch of texts with null-guard.
+
+    Up to _EMBED_CONCURRENCY API calls are in flight at once; the sync
+    client runs in worker threads, so the event loop stays free.  Results
+    keep the input order.
+    """
+    _ensure_initialized()
+    sem = asyncio.Semaphore(_EMBED_CONCURRENCY)
+    total = len(texts)
+
+    async def _one(i: int) -> list[list[float]]:
+        async with sem:
+            embeddings = await asyncio.to_thread(_embed_batch, texts[i:i + _EMBED_BATCH_SIZE], i)
+        logger.info(f"Embeddings batch {i//_EMBED_BATCH_SIZE + 1}: {len(embeddings)} of {total} texts done")
+        return embeddings
+
+    batches = await asyncio.gather(*(_one(i) for i in range(0, total, _EMBED_BATCH_SIZE)))
+    all_embeddings = [emb for batch in batches for emb in batch]
+    _log_null_embeddings(all_embeddings)
     return all_embeddings
 
 
@@ -157,7 +178,7 @@ async def add_chunks_to_store(doc_id: int, user_id: int,
     logger.info(f"[doc:{doc_id}] Generating embeddings for {len(texts)} chunks...")
 
     start_time = time.time()
-    embeddings = get_embeddings_batch(texts)
+    embeddings = await get_embeddings_batch_async(texts)
     embed_time = time.time() - start_time
     logger.info(f"[doc:{doc_id}] Embeddings generated in {embed_time:.1f}s")
 
@@ -193,7 +214,8 @@ async def add_chunks_to_store(doc_id: int, user_id: int,
     if not ids:
         raise ValueError("No valid embeddings were generated for this document")
 
-    collection.add(
+    await asyncio.to_thread(
+        collection.add,
         ids=ids,
         embeddings=valid_embeddings,
         documents=valid_texts,
@@ -411,7 +433,7 @@ async def delete_document_chunks(doc_id: int):
     _ensure_initialized()
     try:
         results = collection.get(
-            where={"doc_id": str(doc_id)},
+            where={"doc_id": str(doc_id)}, include=[],
         )
         if results and results["ids"]:
             count = len(results["ids"])
@@ -428,7 +450,7 @@ async def delete_user_chunks(user_id: int):
     _ensure_initialized()
     try:
         results = collection.get(
-            where={"user_id": str(user_id)},
+            where={"user_id": str(user_id)}, include=[],
         )
         if results and results["ids"]:
             count = len(results["ids"])
@@ -462,7 +484,7 @@ def get_user_chunk_count(user_id: int) -> int:
         if not collection:
             return 0
         results = collection.get(
-            where={"user_id": str(user_id)},
+            where={"user_id": str(user_id)}, include=[],
         )
         return len(results["ids"]) if results and results["ids"] else 0
     except Exception: